@@ -5,14 +5,14 @@ import json
 import random
 from typing import Any, Dict, List, Optional
 
-from llm.llm_client import GeminiClient
+from llm.llm_client import GeminiClient, get_default_client
 
 
 class AnalysisDecisionAgent:
     """Builds multi-query analysis plans and follow-up decisions."""
 
     def __init__(self, llm: Optional[GeminiClient] = None) -> None:
-        self.llm = llm or GeminiClient()
+        self.llm = llm or get_default_client()
 
     # ------------------------------------------------------------------
     # Planning
@@ -5,7 +5,7 @@ Heavy planning -> Data extraction -> Analysis -> Report generation
 NO TEMPLATES. ONLY REAL DATA.
 """
 
-from llm.llm_client import GeminiClient
+from llm.llm_client import get_default_client
 from typing import Dict, List, Any
 import json
 import re
@@ -25,7 +25,7 @@ class ChainOfThoughtReportAgent:
     
     def __init__(self, supabase_agent):
         self.supabase_agent = supabase_agent
-        self.llm = GeminiClient()
+        self.llm = get_default_client()
         self.temp_dir = tempfile.mkdtemp()
         
         # Get actual database schema
@@ -44,7 +44,7 @@ class ChainOfThoughtReportAgent:
 
                 if sample_result["success"] and sample_result["data"]:
                     rows = sample_result["data"]
-                    columns = list(rows[0].keys())
+                    columns = sample_result["columns"] or list(rows[0])
 
                     column_types = {}
                     for col in columns:
@@ -16,8 +16,8 @@ from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 
-from agents.supabase_agent import SupabaseAgent
-from llm.llm_client import GeminiClient
+from agents.supabase_agent import SupabaseAgent, get_default_agent
+from llm.llm_client import GeminiClient, get_default_client
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -54,8 +54,8 @@ class CSVDatabaseAgent:
         supabase_agent: Optional[SupabaseAgent] = None,
         max_preview_rows: int = 5000,
     ) -> None:
-        self.llm = llm or GeminiClient()
-        self.supabase_agent = supabase_agent or SupabaseAgent()
+        self.llm = llm or get_default_client()
+        self.supabase_agent = supabase_agent or get_default_agent()
         self.max_preview_rows = max_preview_rows
 
     # ------------------------------------------------------------------
@@ -7,18 +7,19 @@ from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
-from llm.llm_client import GeminiClient
+from llm.llm_client import GeminiClient, get_default_client
 
 
 class ResultExplainerAgent:
     def __init__(self, llm: Optional[GeminiClient] = None) -> None:
-        self.llm = llm or GeminiClient()
+        self.llm = llm or get_default_client()
 
     def explain(self, sql: str, rows: List[Dict[str, Any]], columns: List[str]) -> str:
         if not rows:
             return "Query returned no rows. Verify filters or timeframe."
 
-        dataframe = pd.DataFrame(rows)
+        # Rows may be tuples (column names passed separately) or dicts
+        dataframe = pd.DataFrame(rows, columns=columns or None)
         description = self._describe_dataframe(dataframe)
         prompt = f"""
 You are an analytics copilot. Translate the findings below into concise
@@ -1,5 +1,7 @@
 # agents/sql_executor.py
 
+from typing import Optional
+
 from db import get_db
 
 class SQLExecutorAgent:
@@ -12,15 +14,15 @@ class SQLExecutorAgent:
         self.db = get_db()
         self.db.connect()
 
-    def execute(self, sql: str) -> dict:
+    def execute(self, sql: str, limit: Optional[int] = None) -> dict:
         """
-        Executes the SQL query and returns:
+        Executes the SQL query (reading at most `limit` rows) and returns:
         {
             success: bool,
-            rows: list of dict,
+            rows: list of row tuples (or dicts, depending on backend),
             columns: list of str,
             error: str or None
         }
         """
-        result = self.db.execute(sql)
+        result = self.db.execute(sql, limit=limit)
         return result
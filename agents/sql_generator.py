@@ -1,15 +1,45 @@
 # agents/sql_generator.py
 
+import hashlib
+import json
+import threading
+
+from cachetools import LRUCache
+
 from llm.llm_client import GeminiClient
 
 class SQLGeneratorAgent:
+    # Generated SQL kept per (question, schema) so repeated analyses skip the LLM
+    CACHE_SIZE = 1024
+
     def __init__(self, llm_client: GeminiClient):
         self.llm = llm_client
+        self._cache = LRUCache(maxsize=self.CACHE_SIZE)
+        self._cache_lock = threading.Lock()
+
+    @staticmethod
+    def _schema_key(schema: dict) -> str:
+        encoded = json.dumps(schema, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
 
     def generate_sql(self, question: str, schema: dict) -> str:
         """
         Generate SQL query from natural language question and database schema
+        (memoised per question and schema)
         """
+        key = (question, self._schema_key(schema))
+        with self._cache_lock:
+            sql = self._cache.get(key)
+        if sql is not None:
+            return sql
+
+        sql = self._generate_sql(question, schema)
+        if sql:
+            with self._cache_lock:
+                self._cache[key] = sql
+        return sql
+
+    def _generate_sql(self, question: str, schema: dict) -> str:
         # Build prompt for Gemini
         schema_text = "\n".join([f"{table}: {', '.join(columns)}" for table, columns in schema.items()])
         
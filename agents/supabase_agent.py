@@ -1,28 +1,61 @@
 #!/usr/bin/env python3
-"""Simplified Supabase agent using REST API only (no RPC sql function required)"""
+"""Simplified Supabase agent over the REST API (uses the exec_sql RPC function when installed)"""
 
 from __future__ import annotations
 
 import logging
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
+import httpx
 import pandas as pd
-from supabase import Client, create_client
+from supabase import Client, ClientOptions, create_client
 
-from config import SUPABASE_KEY, SUPABASE_URL
+from config import SUPABASE_KEY, SUPABASE_SCHEMA, SUPABASE_URL
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# PostgREST error code for "function not found in the schema cache"
+RPC_MISSING_CODE = "PGRST202"
+
 class SupabaseAgent:
-    """Simplified Supabase integration using REST API only"""
+    """Simplified Supabase integration over the REST API (exec_sql RPC optional)"""
     
     # Known tables in your database - update this list based on your schema
     KNOWN_TABLES = ["sales_data"]  # Add your table names here
     
+    # Catalog rarely changes, so schema lookups are served from memory for this long
+    SCHEMA_CACHE_TTL = 300
+    
+    # Shared keep-alive pool for every REST/RPC call made through this agent
+    HTTP_POOL_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50)
+    HTTP_TIMEOUT = 30.0
+    
+    # Insert batches in flight during uploads: inserts are latency-bound, so overlapping
+    # them pays off, and 8 stays well under the connection pooler's client limit
+    UPLOAD_WORKERS = 8
+    
     def __init__(self):
-        self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        # An explicit transport owns the pool (httpx ignores the client's http2/limits then)
+        self.http_client = httpx.Client(
+            timeout=self.HTTP_TIMEOUT,
+            transport=httpx.HTTPTransport(http2=True, retries=2, limits=self.HTTP_POOL_LIMITS),
+        )
+        self.supabase: Client = create_client(
+            SUPABASE_URL,
+            SUPABASE_KEY,
+            options=ClientOptions(httpx_client=self.http_client),
+        )
+        self._schema_cache: Optional[Dict[str, List[Dict[str, str]]]] = None
+        self._schema_ts = 0.0
+        # Bumped whenever uploaded data changes, so derived results can be invalidated
+        self.data_version = 0
+        # Whether the optional exec_sql RPC exists (None until the first call tells us)
+        self.rpc_available: Optional[bool] = None
         logger.info("SupabaseAgent: Connected to Supabase (REST API mode)")
     
     @staticmethod
@@ -36,8 +69,11 @@ class SupabaseAgent:
             "error": None,
         }
 
-    def execute_query(self, sql: str) -> Dict[str, Any]:
-        """Execute SQL queries - uses RPC for complex queries, REST for simple ones"""
+    def execute_query(self, sql: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Execute SQL queries - uses RPC for complex queries, REST for simple ones.
+        
+        `limit` caps the rows fetched (e.g. a sample for analysis).
+        """
         import re
         
         sql_clean = (sql or "").strip()
@@ -50,23 +86,28 @@ class SupabaseAgent:
         # Check if this is an aggregation query (GROUP BY, SUM, COUNT, etc.)
         has_aggregation = bool(re.search(r'\b(GROUP\s+BY|SUM|COUNT|AVG|MAX|MIN)\b', sql_clean, re.IGNORECASE))
         
+        if has_aggregation and self.rpc_available is False:
+            return self._execute_aggregation_with_pandas(sql_clean, limit)
+        
         if has_aggregation:
             # Try to use direct PostgreSQL connection via RPC
             try:
-                response = self.supabase.rpc('exec_sql', {'query': sql_clean}).execute()
-                rows = response.data or []
+                rpc_sql = sql_clean
+                if limit:
+                    rpc_sql = f"SELECT * FROM ({sql_clean.rstrip(';')}) AS sample LIMIT {int(limit)}"
+                rows = self._rpc_query(rpc_sql)
                 
                 result.update({
                     "success": True,
                     "data": rows,
-                    "columns": list(rows[0].keys()) if rows else [],
+                    "columns": list(rows[0]) if rows else [],
                     "row_count": len(rows),
                 })
                 return result
             except Exception as rpc_error:
                 logger.warning(f"RPC exec_sql failed: {rpc_error}, falling back to pandas aggregation")
                 # Fall back to manual aggregation using pandas
-                return self._execute_aggregation_with_pandas(sql_clean)
+                return self._execute_aggregation_with_pandas(sql_clean, limit)
         
         # For simple queries, use REST API
         table_match = re.search(r'FROM\s+["\']?(\w+)["\']?', sql_clean, re.IGNORECASE)
@@ -82,10 +123,10 @@ class SupabaseAgent:
             
             # Parse LIMIT
             limit_match = re.search(r'LIMIT\s+(\d+)', sql_clean, re.IGNORECASE)
-            if limit_match:
-                query = query.limit(int(limit_match.group(1)))
-            else:
-                query = query.limit(1000)  # Default limit
+            row_limit = int(limit_match.group(1)) if limit_match else 1000  # Default limit
+            if limit:
+                row_limit = min(row_limit, limit)
+            query = query.limit(row_limit)
             
             # Execute
             response = query.execute()
@@ -94,7 +135,7 @@ class SupabaseAgent:
             result.update({
                 "success": True,
                 "data": rows,
-                "columns": list(rows[0].keys()) if rows else [],
+                "columns": list(rows[0]) if rows else [],
                 "row_count": len(rows),
             })
             
@@ -104,7 +145,7 @@ class SupabaseAgent:
 
         return result
     
-    def _execute_aggregation_with_pandas(self, sql: str) -> Dict[str, Any]:
+    def _execute_aggregation_with_pandas(self, sql: str, limit: Optional[int] = None) -> Dict[str, Any]:
         """Execute aggregation queries using pandas when RPC is not available"""
         import re
         result = self._result_template()
@@ -180,6 +221,8 @@ class SupabaseAgent:
             limit_match = re.search(r'LIMIT\s+(\d+)', sql, re.IGNORECASE)
             if limit_match:
                 grouped = grouped.head(int(limit_match.group(1)))
+            if limit:
+                grouped = grouped.head(limit)
             
             # Convert to dict records
             rows = grouped.to_dict('records')
@@ -197,8 +240,16 @@ class SupabaseAgent:
         
         return result
     
+    def invalidate_schema_cache(self) -> None:
+        """Drop the memoised schema so the next lookup hits Supabase again"""
+        self._schema_cache = None
+        self._schema_ts = 0.0
+    
     def get_database_schema(self) -> Dict[str, List[Dict[str, str]]]:
-        """Get schema by sampling first row of each table"""
+        """Get schema by sampling first row of each table (cached for SCHEMA_CACHE_TTL seconds)"""
+        if self._schema_cache and time.time() - self._schema_ts < self.SCHEMA_CACHE_TTL:
+            return self._schema_cache
+        
         schema = {}
         
         for table in self.KNOWN_TABLES:
@@ -219,6 +270,8 @@ class SupabaseAgent:
             except Exception as e:
                 logger.warning(f"  ⚠ Failed to get schema for {table}: {e}")
         
+        self._schema_cache = schema
+        self._schema_ts = time.time()
         return schema
     
     def get_table_sample(self, table_name: str, limit: int = 5) -> Dict:
@@ -228,7 +281,7 @@ class SupabaseAgent:
             return {
                 "success": True,
                 "data": response.data or [],
-                "columns": list(response.data[0].keys()) if response.data else []
+                "columns": list(response.data[0]) if response.data else []
             }
         except Exception as e:
             return {"success": False, "error": str(e), "data": [], "columns": []}
@@ -242,10 +295,87 @@ class SupabaseAgent:
         except Exception as e:
             return {"row_count": 0, "error": str(e)}
     
+    def _rpc_query(self, sql: str) -> List[Dict[str, Any]]:
+        """Run raw SQL through the exec_sql RPC and return its rows.
+        
+        A missing function is remembered, so later calls fail fast without a round-trip.
+        """
+        if self.rpc_available is False:
+            raise RuntimeError("exec_sql RPC function is not installed")
+        try:
+            response = self.supabase.rpc('exec_sql', {'query': sql}).execute()
+        except Exception as exc:
+            if getattr(exc, "code", None) == RPC_MISSING_CODE:
+                self.rpc_available = False
+                logger.info("SupabaseAgent: exec_sql RPC not installed, using REST fallbacks")
+            raise
+        self.rpc_available = True
+        return response.data or []
+    
+    def execute_rpc_query(self, sql: str) -> Dict[str, Any]:
+        """Run a SELECT through the exec_sql RPC (not capped by PostgREST max-rows)"""
+        result = self._result_template()
+        try:
+            rows = self._rpc_query(sql)
+            result.update({
+                "success": True,
+                "data": rows,
+                "columns": list(rows[0]) if rows else [],
+                "row_count": len(rows),
+            })
+        except Exception as exc:
+            result["error"] = str(exc)
+            logger.warning("SupabaseAgent: RPC query failed (%s)", exc)
+        return result
+    
+    def execute_statement(self, sql: str) -> Dict[str, Any]:
+        """Run a statement that returns no rows (DDL, REFRESH) through the exec_sql RPC"""
+        result = self._result_template()
+        try:
+            self._rpc_query(sql)
+            result["success"] = True
+        except Exception as exc:
+            result["error"] = str(exc)
+            logger.warning("SupabaseAgent: Statement failed (%s)", exc)
+        return result
+    
+    def get_bulk_table_stats(self, tables: List[str]) -> Dict[str, int]:
+        """Row counts for many tables in one round-trip (planner estimates from pg_class)"""
+        if not tables:
+            return {}
+        
+        names = ", ".join("'" + table.replace("'", "''") + "'" for table in tables)
+        schema = SUPABASE_SCHEMA.replace("'", "''")
+        sql = (
+            "SELECT c.relname AS table_name, c.reltuples::bigint AS row_count "
+            "FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            f"WHERE n.nspname = '{schema}' AND c.relkind IN ('r', 'p') AND c.relname IN ({names})"
+        )
+        
+        counts: Dict[str, int] = {}
+        if self.rpc_available is not False:
+            try:
+                for row in self._rpc_query(sql):
+                    if (row.get("row_count") or 0) > 0:
+                        counts[row["table_name"]] = int(row["row_count"])
+            except Exception as e:
+                if self.rpc_available is not False:
+                    logger.warning(f"Bulk table stats failed: {e}, falling back to per-table counts")
+        
+        # Tables not yet analysed report no estimate, so count those exactly
+        for table in tables:
+            if table not in counts:
+                counts[table] = self.get_table_stats(table).get("row_count", 0)
+        return counts
+    
     def list_tables(self) -> List[str]:
         """List all known tables"""
         return self.KNOWN_TABLES.copy()
     
+    def close_connection(self):
+        """Close the shared HTTP connection pool"""
+        self.http_client.close()
+    
     def upload_csv_to_supabase(self, csv_path: str, table_name: str = None) -> Dict:
         """Upload CSV to Supabase"""
         print(f"📤 Uploading CSV to Supabase: {csv_path}")
@@ -261,26 +391,30 @@ class SupabaseAgent:
             
             print(f"📊 Uploading {len(df)} rows to table '{table_name}'")
             
-            # Convert to records and upload in batches
-            records = df.to_dict('records')
+            # Upload in batches, materialising JSON-safe records one batch at a time
             batch_size = 1000
             uploaded = 0
+            total_rows = len(df)
             
-            for i in range(0, len(records), batch_size):
-                batch = records[i:i + batch_size]
-                try:
-                    self.supabase.table(table_name).insert(batch).execute()
-                    uploaded += len(batch)
-                    print(f"📈 Uploaded {uploaded}/{len(records)} rows")
-                except Exception as e:
-                    print(f"❌ Batch upload error: {e}")
-                    continue
+            with ThreadPoolExecutor(max_workers=self.UPLOAD_WORKERS) as executor:
+                futures = [
+                    executor.submit(self._insert_batch, table_name, df.iloc[i:i + batch_size])
+                    for i in range(0, total_rows, batch_size)
+                ]
+                for future in as_completed(futures):
+                    try:
+                        uploaded += future.result()
+                        print(f"📈 Uploaded {uploaded}/{total_rows} rows")
+                    except Exception as e:
+                        print(f"❌ Batch upload error: {e}")
             
             print(f"✅ Successfully uploaded {uploaded} rows to '{table_name}'")
             
             # Update KNOWN_TABLES
             if table_name not in self.KNOWN_TABLES:
                 self.KNOWN_TABLES.append(table_name)
+            self.invalidate_schema_cache()
+            self.data_version += 1
             
             return {
                 "success": True,
@@ -309,9 +443,6 @@ class SupabaseAgent:
         # Add UUID primary key
         df['id'] = [str(uuid.uuid4()) for _ in range(len(df))]
         
-        # Handle nulls
-        df = df.where(pd.notnull(df), None)
-        
         # Convert timestamps to strings
         for col in df.columns:
             if df[col].dtype == 'object':
@@ -319,6 +450,30 @@ class SupabaseAgent:
                 if not sample.empty:
                     first_val = sample.iloc[0]
                     if hasattr(first_val, 'strftime'):
-                        df[col] = df[col].astype(str)
+                        df[col] = df[col].astype(str).where(df[col].notna(), None)
+        
+        # Handle nulls in text columns only - numeric columns keep their native
+        # dtype (None would force an object upcast) and are nulled per upload batch
+        text_cols = df.select_dtypes(include=['object', 'string']).columns
+        df[text_cols] = df[text_cols].astype(object).where(df[text_cols].notna(), None)
         
         return df
+    
+    def _insert_batch(self, table_name: str, batch_df: pd.DataFrame) -> int:
+        """Insert one batch and return the number of rows sent"""
+        batch_data = self._batch_records(batch_df)
+        self.supabase.table(table_name).insert(batch_data).execute()
+        return len(batch_data)
+    
+    @staticmethod
+    def _batch_records(batch_df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Materialise a batch as JSON-safe records (NaN -> None)"""
+        values = batch_df.astype(object).where(batch_df.notna(), None).to_numpy(dtype=object)
+        columns = batch_df.columns.tolist()
+        return [dict(zip(columns, row)) for row in values]
+
+
+@lru_cache(maxsize=None)
+def get_default_agent() -> SupabaseAgent:
+    """Process-wide SupabaseAgent, so every caller shares one client and HTTP pool"""
+    return SupabaseAgent()
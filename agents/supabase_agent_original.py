@@ -6,11 +6,16 @@ from __future__ import annotations
 import logging
 import re
 import uuid
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from sqlglot import exp, parse_one
+from sqlglot.errors import SqlglotError
 from supabase import Client, create_client
 
 from config import (
@@ -26,11 +31,78 @@ from config import (
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# pandas/numpy scalar type -> PostgreSQL column type
+_DTYPE_MAP = {
+    np.int64: "BIGINT",
+    np.int32: "INTEGER",
+    np.float64: "DOUBLE PRECISION",
+    np.float32: "REAL",
+    np.bool_: "BOOLEAN",
+}
+
+
+def _literal_value(literal: exp.Literal) -> Any:
+    """Python value of a SQL literal (Literal.to_py needs a newer sqlglot than requirements pin)"""
+    if literal.is_string:
+        return literal.this
+    return int(literal.this) if literal.is_int else float(literal.this)
+
+
+def _collect_eq_filters(condition: exp.Expression, filters: List[Tuple[str, Any]]) -> bool:
+    """Append `column = literal` leaves of a top-level AND chain; False if anything else appears"""
+    if isinstance(condition, exp.Paren):
+        return _collect_eq_filters(condition.this, filters)
+    if isinstance(condition, exp.And):
+        return _collect_eq_filters(condition.this, filters) and _collect_eq_filters(condition.expression, filters)
+    if (
+        isinstance(condition, exp.EQ)
+        and isinstance(condition.this, exp.Column)
+        and isinstance(condition.expression, exp.Literal)
+    ):
+        filters.append((condition.this.name, _literal_value(condition.expression)))
+        return True
+    return False
+
+
+@lru_cache(maxsize=256)
+def _parse_rest_query(sql: str) -> Optional[Tuple[str, Optional[Tuple[Tuple[str, Any], ...]], Optional[int]]]:
+    """Parse SQL once into (table, equality filters, limit) for the REST fallback.
+
+    Returns None when the statement cannot be parsed or names no table. Filters are
+    None when the WHERE clause is not a plain AND-chain of `column = literal`.
+    """
+    try:
+        tree = parse_one(sql, read="postgres")
+    except SqlglotError:
+        return None
+
+    table = tree.find(exp.Table)
+    if table is None or not table.name:
+        return None
+
+    filters: List[Tuple[str, Any]] = []
+    where = tree.args.get("where")
+    if where is not None:
+        # Anything the .eq() filters can't express exactly (NOT, OR, ranges, subqueries) is not
+        # pushed down: better no REST answer than an unfiltered one
+        if not _collect_eq_filters(where.this, filters):
+            filters = None
+
+    limit = None
+    limit_node = tree.args.get("limit")
+    if limit_node is not None and isinstance(limit_node.expression, exp.Literal):
+        limit = int(limit_node.expression.this)
+
+    return table.name, tuple(filters) if filters is not None else None, limit
+
 class SupabaseAgent:
     """
     Modern Supabase integration with PostgreSQL optimization
     """
     
+    # Insert batches in flight during uploads (see SupabaseAgent.UPLOAD_WORKERS in agents/supabase_agent.py)
+    UPLOAD_WORKERS = 8
+    
     def __init__(self):
         self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
         self.db_connection = None
@@ -93,17 +165,17 @@ class SupabaseAgent:
             total_rows = len(df)
             uploaded_rows = 0
             
-            for i in range(0, total_rows, batch_size):
-                batch_df = df.iloc[i:i + batch_size]
-                batch_data = batch_df.to_dict('records')
-                
-                try:
-                    result = self.supabase.table(table_name).insert(batch_data).execute()
-                    uploaded_rows += len(batch_data)
-                    print(f"📈 Uploaded batch {i//batch_size + 1}: {uploaded_rows}/{total_rows} rows")
-                except Exception as e:
-                    print(f"❌ Batch upload error: {e}")
-                    continue
+            with ThreadPoolExecutor(max_workers=self.UPLOAD_WORKERS) as executor:
+                futures = {
+                    executor.submit(self._insert_batch, table_name, df.iloc[i:i + batch_size]): i // batch_size + 1
+                    for i in range(0, total_rows, batch_size)
+                }
+                for future in as_completed(futures):
+                    try:
+                        uploaded_rows += future.result()
+                        print(f"📈 Uploaded batch {futures[future]}: {uploaded_rows}/{total_rows} rows")
+                    except Exception as e:
+                        print(f"❌ Batch upload error: {e}")
             
             print(f"✅ Successfully uploaded {uploaded_rows} rows to Supabase table '{table_name}'")
             
@@ -146,8 +218,8 @@ class SupabaseAgent:
                 cursor.execute(sql_clean)
 
                 if cursor.description:
-                    rows = cursor.fetchall()
-                    data = [dict(row) for row in rows]
+                    # RealDictRow is already a dict subclass - no per-row copy needed
+                    data = cursor.fetchall()
                     result.update(
                         {
                             "success": True,
@@ -167,26 +239,30 @@ class SupabaseAgent:
 
         # Fallback to parsing SQL and using Supabase REST API
         try:
-            # Extract table name from SELECT queries
-            table_name = self._extract_table_name(sql_clean)
-            if not table_name:
+            # Parse table, WHERE filters and LIMIT in a single (cached) pass
+            parsed = _parse_rest_query(sql_clean)
+            if not parsed:
                 result["error"] = "Could not parse table name from SQL. Use direct Postgres connection for complex queries."
                 return result
+            table_name, filters, limit = parsed
+            if filters is None:
+                result["error"] = (
+                    "WHERE clause not supported via REST API (only column = value conditions joined by AND). "
+                    "Enable Postgres connection for full SQL support."
+                )
+                return result
 
             # Simple SELECT * or SELECT columns queries
             if sql_clean.upper().startswith("SELECT"):
                 query = self.supabase.table(table_name).select("*")
                 
                 # Apply basic WHERE filters if present
-                where_match = self._parse_simple_where(sql_clean)
-                if where_match:
-                    for key, value in where_match.items():
-                        query = query.eq(key, value)
+                for key, value in filters:
+                    query = query.eq(key, value)
                 
                 # Apply LIMIT if present
-                limit_match = self._parse_limit(sql_clean)
-                if limit_match:
-                    query = query.limit(limit_match)
+                if limit:
+                    query = query.limit(limit)
                 
                 response = query.execute()
                 rows = response.data or []
@@ -278,50 +354,58 @@ class SupabaseAgent:
         # Add UUID primary key
         df['id'] = [str(uuid.uuid4()) for _ in range(len(df))]
         
-        # Handle null values
-        df = df.where(pd.notnull(df), None)
+        # Parse date/time-named text columns and Timestamp-holding object columns
+        for col in df.select_dtypes(include=['object', 'string']).columns:
+            series = df[col]
+            first_idx = series.first_valid_index()
+            if ('date' in col.lower() or 'time' in col.lower()
+                    or (first_idx is not None and hasattr(series[first_idx], 'strftime'))):
+                parsed = pd.to_datetime(series, errors='coerce')
+                # Only adopt the parse when every value converted (same contract as errors='ignore')
+                if parsed.notna().sum() == series.notna().sum():
+                    df[col] = parsed
         
-        # Convert datetime columns
-        for col in df.columns:
-            if 'date' in col.lower() or 'time' in col.lower():
-                try:
-                    df[col] = pd.to_datetime(df[col], errors='ignore')
-                    # Convert to string for JSON serialization
-                    df[col] = df[col].astype(str)
-                except:
-                    pass
+        # Serialise all datetime columns to strings in a single batch for JSON
+        for col in df.select_dtypes(include=['datetime', 'datetimetz']).columns:
+            df[col] = df[col].astype(str).where(df[col].notna(), None)
         
-        # Handle any remaining Timestamp objects
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                # Check if column contains Timestamp-like objects
-                sample_values = df[col].dropna().head(5)
-                if not sample_values.empty:
-                    first_val = sample_values.iloc[0]
-                    if hasattr(first_val, 'strftime') or str(type(first_val)).endswith("Timestamp'>"):
-                        df[col] = df[col].astype(str)
+        # Handle null values in text columns only - numeric columns keep their native
+        # dtype (None would force an object upcast) and are nulled per upload batch
+        text_cols = df.select_dtypes(include=['object', 'string']).columns
+        df[text_cols] = df[text_cols].astype(object).where(df[text_cols].notna(), None)
         
         return df
     
+    def _insert_batch(self, table_name: str, batch_df: pd.DataFrame) -> int:
+        """Insert one batch and return the number of rows sent"""
+        batch_data = self._batch_records(batch_df)
+        self.supabase.table(table_name).insert(batch_data).execute()
+        return len(batch_data)
+    
+    @staticmethod
+    def _batch_records(batch_df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Materialise a batch as JSON-safe records (NaN -> None)"""
+        values = batch_df.astype(object).where(batch_df.notna(), None).to_numpy(dtype=object)
+        columns = batch_df.columns.tolist()
+        return [dict(zip(columns, row)) for row in values]
+    
     def _create_supabase_table(self, table_name: str, df: pd.DataFrame):
         """Create table structure in Supabase"""
         
         # Generate CREATE TABLE statement
         column_definitions = ["id UUID PRIMARY KEY DEFAULT gen_random_uuid()"]
         
-        for col in df.columns:
+        for col, dtype in df.dtypes.items():
             if col == 'id':
                 continue
                 
             # Determine PostgreSQL data type
-            if df[col].dtype == 'int64':
-                col_type = "INTEGER"
-            elif df[col].dtype == 'float64':
-                col_type = "DECIMAL"
-            elif 'date' in col.lower() or 'time' in col.lower():
-                col_type = "TIMESTAMP"
-            else:
-                col_type = "TEXT"
+            col_type = _DTYPE_MAP.get(dtype.type)
+            if col_type is None:
+                if pd.api.types.is_datetime64_any_dtype(dtype) or 'date' in col.lower() or 'time' in col.lower():
+                    col_type = "TIMESTAMP"
+                else:
+                    col_type = "TEXT"
             
             column_definitions.append(f"{col} {col_type}")
         
@@ -361,37 +445,6 @@ class SupabaseAgent:
         logger.warning("SupabaseAgent: Cannot list tables without Postgres connection. Returning empty list.")
         return []
     
-    def _extract_table_name(self, sql: str) -> Optional[str]:
-        """Extract table name from SQL query"""
-        import re
-        # Match FROM table_name or FROM "table_name"
-        match = re.search(r'FROM\s+["\']?(\w+)["\']?', sql, re.IGNORECASE)
-        if match:
-            return match.group(1)
-        # Try INSERT INTO pattern
-        match = re.search(r'INSERT\s+INTO\s+["\']?(\w+)["\']?', sql, re.IGNORECASE)
-        if match:
-            return match.group(1)
-        return None
-    
-    def _parse_simple_where(self, sql: str) -> Dict[str, Any]:
-        """Parse simple WHERE column = 'value' clauses"""
-        import re
-        where_dict = {}
-        # Match WHERE column = value
-        matches = re.findall(r'WHERE\s+(\w+)\s*=\s*["\']?([^"\';\s]+)["\']?', sql, re.IGNORECASE)
-        for col, val in matches:
-            where_dict[col] = val
-        return where_dict
-    
-    def _parse_limit(self, sql: str) -> Optional[int]:
-        """Parse LIMIT clause"""
-        import re
-        match = re.search(r'LIMIT\s+(\d+)', sql, re.IGNORECASE)
-        if match:
-            return int(match.group(1))
-        return None
-    
     def close_connection(self):
         """Close database connection"""
         if self.db_connection:
@@ -4,34 +4,104 @@ FastAPI Backend Server for AI Data Analysis Platform
 Provides REST API endpoints for Next.js frontend
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import uvicorn
+import asyncio
+from contextlib import asynccontextmanager
 import tempfile
+import shutil
 import os
 from datetime import datetime
 import json
+import hashlib
 import logging
+import re
+import threading
+import orjson
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from cachetools import TTLCache
 
 # Import existing agents
-from agents.supabase_agent import SupabaseAgent
+from agents.supabase_agent import get_default_agent
 from data_driven_report import DataDrivenReportGenerator
 from graph import IntelligentSQLAgentGraph
-from llm.llm_client import GeminiClient
+from llm.llm_client import GeminiClient, get_default_client
+from llm.response_cache import ResponseCache
 import config
+from state_store import create_state_store
+from request_batcher import RequestBatcher
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Chat intent keywords, matched in one pass; the trailing (\w*) lets plurals like
+# "tables" hit while recording whether the keyword was a whole word
+DATA_KEYWORDS = (
+    "how many", "count", "show", "list", "get", "find", "what", "cities", "countries",
+    "sales", "revenue", "customers", "products", "data", "table", "records",
+)
+COUNT_KEYWORDS = ("how many", "count")
+KEYWORD_RE = re.compile(r"\b(" + "|".join(map(re.escape, DATA_KEYWORDS)) + r")(\w*)", re.IGNORECASE)
+WORD_RE = re.compile(r"[a-z_]{3,}")
+# Bare "how many <noun> (are there)?" questions; anything more (filters, years, thresholds) goes to the graph
+SIMPLE_COUNT_RE = re.compile(
+    r"^\s*(?:how\s+many|count(?:\s+the)?)\s+(?:distinct\s+|unique\s+|different\s+)?([a-z_]{3,})"
+    r"(?:\s+(?:are\s+there|exist|do\s+(?:i|we)\s+have|are\s+in\s+the\s+(?:database|data)|in\s+the\s+(?:database|data)))?"
+    r"\s*[?.!]*\s*$",
+    re.IGNORECASE,
+)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (handles numpy scalars and datetimes natively)"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+# Dashboards poll these payloads on a timer; let clients revalidate cheaply
+POLL_CACHE_CONTROL = "public, max-age=30, stale-while-revalidate=60"
+
+
+def etag_response(request: Request, payload: Any) -> Response:
+    """Serialise payload once and answer 304 when the client already holds this version"""
+    response = ORJSONResponse(payload, headers={"Cache-Control": POLL_CACHE_CONTROL})
+    etag = f'W/"{hashlib.md5(response.body).hexdigest()}"'
+    if etag in {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": POLL_CACHE_CONTROL})
+    response.headers["ETag"] = etag
+    return response
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Refresh chart aggregates and load the cache encoder in the background; release pooled connections on shutdown"""
+    refresher = asyncio.create_task(_refresh_chart_views_periodically())
+    encoder_loader = asyncio.create_task(asyncio.to_thread(response_cache.load_encoder))
+    yield
+    refresher.cancel()
+    encoder_loader.cancel()
+    close_agent = getattr(supabase_agent, "close_connection", None)
+    if close_agent:
+        close_agent()
+    GeminiClient.close()
+    await state_store.close()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="AI Data Analysis Platform API",
     description="REST API for AI-powered data analysis and report generation",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # CORS Configuration - Allow Next.js frontend
@@ -48,16 +118,110 @@ app.add_middleware(
 )
 
 # Initialize agents (singleton pattern)
-supabase_agent = SupabaseAgent()
-llm_client = GeminiClient()
+supabase_agent = get_default_agent()
+llm_client = get_default_client()
 report_generator = DataDrivenReportGenerator(supabase_agent)
 langgraph_agent = IntelligentSQLAgentGraph(supabase_agent=supabase_agent)
 
-# Store for chat conversations (in-memory, use Redis in production)
-conversations: Dict[str, List[Dict]] = {}
+# Chat history, report task status and report paths (Redis when REDIS_URL is set)
+state_store = create_state_store(config.REDIS_URL)
+
+# Live report-progress listeners (SSE), per task id
+task_subscribers: Dict[str, List[asyncio.Queue]] = {}
+TERMINAL_TASK_STATES = {"completed", "failed"}
+
+# Answers to repeated data questions (cleared whenever the data changes)
+response_cache = ResponseCache(maxsize=10_000, ttl=3600, threshold=0.9)
+CACHE_CONTEXT_TURNS = 4  # History messages that are part of a cached answer's key
+
+def _run_langgraph(prompt: str) -> Dict[str, Any]:
+    """Full LangGraph analysis for one prompt (looked up at call time so the agent can be swapped)"""
+    return langgraph_agent.run_intelligent_analysis(prompt, upload_csvs=False, return_state=True)
+
+
+# Concurrent chat/analysis requests are coalesced; identical prompts share one run
+analysis_batcher = RequestBatcher(_run_langgraph, window=0.05, max_batch=8)
 
-# Store for background tasks
-background_tasks_status: Dict[str, Dict] = {}
+# Materialised chart aggregates (built/refreshed on upload and periodically, never in a GET):
+# primary table -> aggregate SQL the dashboard wants, and -> the view currently holding it
+CHART_VIEW_REFRESH_SECONDS = 300
+chart_view_requests: Dict[str, str] = {}
+chart_views: Dict[str, str] = {}
+failed_chart_views: set = set()
+
+# Table list + schema introspection, shared by the dashboard/table endpoints
+schema_cache: TTLCache = TTLCache(maxsize=8, ttl=300)
+schema_cache_lock = threading.Lock()  # also read from worker threads (_fast_count)
+
+
+def get_cached_schema() -> Tuple[List[str], Dict[str, Any]]:
+    """Return (tables, schema), re-reading the catalog only after the TTL or an upload"""
+    with schema_cache_lock:
+        cached = schema_cache.get("schema")
+    if cached is None:
+        cached = (supabase_agent.list_tables(), supabase_agent.get_database_schema())
+        with schema_cache_lock:
+            schema_cache["schema"] = cached
+            schema_cache["loaded_at"] = datetime.now().isoformat()
+    return cached
+
+
+@lru_cache(maxsize=128)
+def detect_chart_columns(column_names: Tuple[str, ...]) -> Tuple[Optional[str], ...]:
+    """Pick (sales, country, city, year, month, product) columns by name heuristics"""
+    lowered = [(col, col.lower()) for col in column_names]
+    sales_col = next((col for col, low in lowered if 'sales' in low or 'amount' in low or 'revenue' in low), None)
+    country_col = next((col for col, low in lowered if 'country' in low), None)
+    city_col = next((col for col, low in lowered if 'city' in low), None)
+    year_col = next((col for col, low in lowered if 'year' in low and 'id' in low), None)
+    month_col = next((col for col, low in lowered if 'month' in low and 'id' in low), None)
+    product_col = next((col for col, low in lowered if 'product' in low and 'line' in low), None)
+    return sales_col, country_col, city_col, year_col, month_col, product_col
+
+
+def keyword_hits(message: str) -> Dict[str, bool]:
+    """Map each keyword found in the message to whether it appeared as a whole word"""
+    hits: Dict[str, bool] = {}
+    for match in KEYWORD_RE.finditer(message):
+        keyword = match.group(1).lower()
+        hits[keyword] = hits.get(keyword, False) or not match.group(2)
+    return hits
+
+
+def _singular(word: str) -> str:
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("ses", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _fast_count(message: str) -> Optional[str]:
+    """Answer bare "how many <tables|thing>" questions with one COUNT query, or None"""
+    match = SIMPLE_COUNT_RE.match(message)
+    if not match:
+        return None
+    word = match.group(1).lower()
+    tables, schema = get_cached_schema()
+    if word in ("tables", "table"):
+        return f"Your database contains {len(tables)} table(s)."
+
+    noun = _singular(word)
+    candidates = {noun, f"{noun}name", f"{noun}_name"}
+    for table in tables:
+        for col in schema.get(table, []):
+            col_name = col["name"] if isinstance(col, dict) else col
+            if col_name.lower() not in candidates:
+                continue
+            result = supabase_agent.execute_query(
+                f"SELECT COUNT(DISTINCT {_quote_ident(col_name)}) AS n FROM {_quote_ident(table)}"
+            )
+            if result["success"] and result["data"] and "n" in result["data"][0]:
+                return f"Found {result['data'][0]['n']} {word}."
+            return None
+    return None
 
 
 def build_visualization_payload(state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -157,35 +321,42 @@ async def chat(request: ChatRequest):
     try:
         conversation_id = request.conversationId or f"conv_{datetime.now().timestamp()}"
         
-        # Initialize conversation history
-        if conversation_id not in conversations:
-            conversations[conversation_id] = []
+        # Cached answers only apply under the same preceding turns (follow-ups depend on them)
+        cache_context = "\n".join(
+            f"{msg['role']}: {msg['content']}"
+            for msg in await state_store.recent_messages(conversation_id, CACHE_CONTEXT_TURNS)
+        )
         
         # Add user message to history
-        conversations[conversation_id].append({
+        await state_store.append_message(conversation_id, {
             "role": "user",
             "content": request.message,
             "timestamp": datetime.now().isoformat()
         })
         
         # Check if this is a data query (mentions data, count, show, how many, etc.)
-        is_data_query = any(keyword in request.message.lower() for keyword in [
-            "how many", "count", "show", "list", "get", "find", "what", "cities", "countries",
-            "sales", "revenue", "customers", "products", "data", "table", "records"
-        ])
+        hits = keyword_hits(request.message)
+        is_data_query = bool(hits)
+        is_count = any(hits.get(keyword) for keyword in COUNT_KEYWORDS)
         
         ai_response = ""
         actions = []
         visualization = None
         
+        answer = None
         if is_data_query:
+            answer = await asyncio.to_thread(response_cache.get, request.message, cache_context)
+        if answer is None and is_count:
+            # Plain counts need one COUNT query, not the full LangGraph pipeline
+            count_response = await asyncio.to_thread(_fast_count, request.message)
+            if count_response:
+                answer = (count_response, None, [])
+        if answer is not None:
+            ai_response, visualization, actions = answer
+        elif is_data_query:
             try:
                 logger.info("LangGraph chat run (conversation=%s)", conversation_id)
-                analysis_state = langgraph_agent.run_intelligent_analysis(
-                    request.message,
-                    upload_csvs=False,
-                    return_state=True,
-                )
+                analysis_state = await analysis_batcher.submit(request.message, request.message)
                 
                 # Extract clean response from analysis state
                 analyzed_results = analysis_state.get("analyzed_results", [])
@@ -203,8 +374,8 @@ async def chat(request: ChatRequest):
                     ai_response = f"{explanation}\n\n{cognitive}"
                     
                     # If asking about count/how many, give direct answer
-                    if any(word in request.message.lower() for word in ["how many", "count"]):
-                        if "table" in request.message.lower():
+                    if is_count:
+                        if "table" in hits:
                             table_count = len(analysis_state.get("available_tables", []))
                             ai_response = f"Your database contains {table_count} table(s)."
                         else:
@@ -218,6 +389,10 @@ async def chat(request: ChatRequest):
                     "action": "navigate",
                     "target": "/explorer"
                 })
+                if ai_response:
+                    await asyncio.to_thread(
+                        response_cache.set, request.message, (ai_response, visualization, actions), cache_context
+                    )
             except Exception as e:
                 logger.exception("LangGraph chat failure")
                 ai_response = (
@@ -230,7 +405,7 @@ async def chat(request: ChatRequest):
             # Build context from conversation history
             context = "\n".join([
                 f"{msg['role']}: {msg['content']}" 
-                for msg in conversations[conversation_id][-5:]  # Last 5 messages
+                for msg in await state_store.recent_messages(conversation_id, 5)  # Last 5 messages
             ])
             
             # Generate conversational AI response
@@ -248,7 +423,7 @@ Response:"""
             ai_response = llm_client.generate(prompt)
         
         # Add AI response to history
-        conversations[conversation_id].append({
+        await state_store.append_message(conversation_id, {
             "role": "assistant",
             "content": ai_response,
             "timestamp": datetime.now().isoformat()
@@ -268,21 +443,44 @@ Response:"""
 # DASHBOARD ENDPOINTS
 # ============================================================================
 
+def _quote_literal(value: str) -> str:
+    """Quote a SQL string literal, escaping embedded single quotes"""
+    return "'" + value.replace("'", "''") + "'"
+
+@lru_cache(maxsize=32)
+def _dashboard_totals_sql(tables: Tuple[str, ...], schema: str) -> str:
+    """Per-table row estimates for the given tables, read from pg_class"""
+    names = ", ".join(_quote_literal(table) for table in tables)
+    return (
+        f"WITH t AS (SELECT tablename FROM pg_tables "
+        f"WHERE schemaname = {_quote_literal(schema)} AND tablename IN ({names})) "
+        "SELECT t.tablename, GREATEST(c.reltuples, 0)::bigint AS row_estimate, "
+        "c.reltuples <= 0 AS unanalysed "
+        "FROM t JOIN pg_class c ON c.relname = t.tablename "
+        f"JOIN pg_namespace n ON n.oid = c.relnamespace AND n.nspname = {_quote_literal(schema)}"
+    )
+
 @app.get("/api/dashboard/stats")
 async def get_dashboard_stats():
     """Get KPI statistics for dashboard cards"""
     try:
-        tables = supabase_agent.list_tables()
+        tables, _ = get_cached_schema()
         
-        # Calculate total records across all tables
-        total_records = 0
-        for table in tables:
-            try:
-                stats = supabase_agent.get_table_stats(table)
-                if isinstance(stats, dict) and "row_count" in stats:
-                    total_records += stats["row_count"]
-            except:
-                continue
+        # Sum the planner estimates (exec_sql RPC), exact-counting only tables without one yet;
+        # fall back to per-table counts when the RPC is missing, fails or misses a table
+        total_records = None
+        if tables and getattr(supabase_agent, "rpc_available", None) is not False:
+            totals = supabase_agent.execute_rpc_query(_dashboard_totals_sql(tuple(tables), config.SUPABASE_SCHEMA))
+            rows = totals["data"] if totals["success"] else []
+            if len(rows) == len(tables):
+                total_records = sum(
+                    supabase_agent.get_table_stats(row["tablename"]).get("row_count", 0) if row["unanalysed"]
+                    else int(row["row_estimate"] or 0)
+                    for row in rows
+                )
+        if total_records is None:
+            # Straight to exact counts: get_bulk_table_stats would retry the same RPC
+            total_records = sum(supabase_agent.get_table_stats(table).get("row_count", 0) for table in tables)
         
         return {
             "tables": len(tables),
@@ -295,11 +493,153 @@ async def get_dashboard_stats():
         print(f"Stats error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Stats error: {str(e)}")
 
+def _quote_ident(name: str) -> str:
+    """Quote a SQL identifier, escaping embedded double quotes"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+@lru_cache(maxsize=256)
+def _top_groups_sql(table: str, group_col: str, sales_col: str, alias: str) -> str:
+    """Top-10 groups by summed sales, e.g. sales by country/product/city"""
+    group, sales = _quote_ident(group_col), _quote_ident(sales_col)
+    return (
+        f"SELECT {group}, SUM({sales}) as {alias} FROM {_quote_ident(table)} "
+        f"WHERE {group} IS NOT NULL GROUP BY {group} ORDER BY {alias} DESC LIMIT 10"
+    )
+
+
+@lru_cache(maxsize=64)
+def _trend_sql(table: str, year_col: str, month_col: str, sales_col: str) -> str:
+    """Monthly summed sales ordered by year/month"""
+    year, month = _quote_ident(year_col), _quote_ident(month_col)
+    return (
+        f"SELECT {year}, {month}, SUM({_quote_ident(sales_col)}) as monthly_sales FROM {_quote_ident(table)} "
+        f"GROUP BY {year}, {month} ORDER BY {year}, {month} LIMIT 50"
+    )
+
+
+@lru_cache(maxsize=64)
+def _grouping_sets_sql(table: str, sales_col: str, grouping_sets: Tuple[Tuple[str, ...], ...]) -> str:
+    """Summed sales for several groupings in one scan, tagged with GROUPING() flags"""
+    dims = list(dict.fromkeys(col for group in grouping_sets for col in group))
+    flags = ", ".join(f"GROUPING({_quote_ident(col)}) AS {_quote_ident('g_' + col)}" for col in dims)
+    sets = ", ".join("(" + ", ".join(_quote_ident(col) for col in group) + ")" for group in grouping_sets)
+    return (
+        f"SELECT {', '.join(_quote_ident(col) for col in dims)}, SUM({_quote_ident(sales_col)}) AS chart_value, "
+        f"{flags} FROM {_quote_ident(table)} GROUP BY GROUPING SETS ({sets})"
+    )
+
+
+def _partition_chart_rows(data: List[Dict[str, Any]], chart_specs: List[Tuple]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """Split GROUPING SETS rows into per-chart rows using the GROUPING() flags"""
+    groups = {spec[4]: (spec[0], spec[5]) for spec in chart_specs}
+    dims = list(dict.fromkeys(col for group in groups for col in group))
+    if not data or any(f"g_{col}" not in data[0] for col in dims):
+        return None
+
+    partitioned: Dict[str, List[Dict[str, Any]]] = {key: [] for key, _ in groups.values()}
+    for row in data:
+        group = tuple(col for col in dims if row[f"g_{col}"] == 0)
+        if group not in groups:
+            continue
+        key, alias = groups[group]
+        shaped = {col: row[col] for col in group}
+        shaped[alias] = row["chart_value"]
+        partitioned[key].append(shaped)
+
+    # Apply each chart's ordering/limit in memory (matches the standalone queries)
+    for group, (key, alias) in groups.items():
+        rows = partitioned[key]
+        if len(group) > 1:
+            rows.sort(key=lambda r: tuple((r[col] is None, r[col]) for col in group))
+            partitioned[key] = rows[:50]
+        else:
+            rows = [r for r in rows if r[group[0]] is not None]
+            rows.sort(key=lambda r: r[alias] or 0, reverse=True)
+            partitioned[key] = rows[:10]
+    return partitioned
+
+
+def _fused_chart_rows(table: str, sales_col: str, chart_specs: List[Tuple]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """Rows per chart key from one GROUPING SETS query, or None if it can't be used"""
+    sql = _grouping_sets_sql(table, sales_col, tuple(spec[4] for spec in chart_specs))
+    query_result = supabase_agent.execute_query(sql)
+    if not query_result["success"]:
+        return None
+    return _partition_chart_rows(query_result["data"], chart_specs)
+
+
+def _chart_view_name(table: str, sql: str) -> str:
+    return f"{table}_chart_agg_{hashlib.sha1(sql.encode()).hexdigest()[:8]}"
+
+
+def _materialized_chart_rows(table: str, sales_col: str, chart_specs: List[Tuple]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """Rows per chart key read from the table's precomputed aggregate view, or None.
+
+    Never issues DDL: it only records the aggregate it wants, which sync_chart_views
+    materialises after the next upload or refresh tick.
+    """
+    sql = _grouping_sets_sql(table, sales_col, tuple(spec[4] for spec in chart_specs))
+    view = _chart_view_name(table, sql)
+    chart_view_requests[table] = sql
+    if chart_views.get(table) != view:
+        return None
+    try:
+        # Read through exec_sql: REST would truncate at PostgREST's max-rows
+        query_result = supabase_agent.execute_rpc_query(f"SELECT * FROM {_quote_ident(view)}")
+    except Exception as e:
+        print(f"Chart view error: {e}")
+        return None
+    if not query_result["success"]:
+        return None
+    return _partition_chart_rows(query_result["data"], chart_specs)
+
+
+def sync_chart_views() -> None:
+    """Create or refresh each requested chart aggregate, dropping views they supersede"""
+    for table, sql in list(chart_view_requests.items()):
+        view = _chart_view_name(table, sql)
+        if view in failed_chart_views:
+            continue
+        previous = chart_views.get(table)
+        if previous == view:
+            supabase_agent.execute_statement(f"REFRESH MATERIALIZED VIEW {_quote_ident(view)}")
+            continue
+        created = supabase_agent.execute_statement(
+            f"CREATE MATERIALIZED VIEW IF NOT EXISTS {_quote_ident(view)} AS {sql}"
+        )
+        if not created["success"]:
+            failed_chart_views.add(view)
+            continue
+        chart_views[table] = view
+        if previous:
+            supabase_agent.execute_statement(f"DROP MATERIALIZED VIEW IF EXISTS {_quote_ident(previous)}")
+
+
+async def _refresh_chart_views_periodically() -> None:
+    while True:
+        await asyncio.sleep(CHART_VIEW_REFRESH_SECONDS)
+        try:
+            await asyncio.to_thread(sync_chart_views)
+        except Exception as e:
+            logger.warning("Chart view refresh failed: %s", e)
+
+
+async def _run_chart_query(key: str, label: str, sql: str, build) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Run one chart query off the event loop and shape its rows, or None on failure"""
+    try:
+        query_result = await asyncio.to_thread(supabase_agent.execute_query, sql)
+        if query_result["success"] and query_result["data"]:
+            return key, build(query_result["data"])
+    except Exception as e:
+        print(f"{label} chart error: {e}")
+    return None
+
 @app.get("/api/dashboard/charts")
-async def get_dashboard_charts():
+async def get_dashboard_charts(request: Request):
     """Get data for dashboard visualizations - dynamically adapts to any database schema"""
     try:
-        tables = supabase_agent.list_tables()
+        tables, schema = get_cached_schema()
         
         if not tables:
             return {
@@ -312,8 +652,7 @@ async def get_dashboard_charts():
         # Use the first table available (dynamic)
         primary_table = tables[0]
         
-        # Get schema - it returns a dict where keys are table names
-        schema = supabase_agent.get_database_schema()
+        # Schema is a dict where keys are table names
         columns = schema.get(primary_table, []) if isinstance(schema, dict) else []
         column_names = [col["name"] if isinstance(col, dict) else col for col in columns]
         
@@ -326,72 +665,80 @@ async def get_dashboard_charts():
             }
         
         # Dynamically detect which columns exist
-        sales_col = next((col for col in column_names if 'sales' in col.lower() or 'amount' in col.lower() or 'revenue' in col.lower()), None)
-        country_col = next((col for col in column_names if 'country' in col.lower()), None)
-        city_col = next((col for col in column_names if 'city' in col.lower()), None)
-        year_col = next((col for col in column_names if 'year' in col.lower() and 'id' in col.lower()), None)
-        month_col = next((col for col in column_names if 'month' in col.lower() and 'id' in col.lower()), None)
-        product_col = next((col for col in column_names if 'product' in col.lower() and 'line' in col.lower()), None)
+        sales_col, country_col, city_col, year_col, month_col, product_col = detect_chart_columns(tuple(column_names))
         
-        result = {}
+        # (key, label, standalone sql, builder, group columns, value alias) per chart
+        chart_specs = []
         
         # Country sales chart
         if country_col and sales_col:
-            try:
-                country_query = f'SELECT "{country_col}", SUM("{sales_col}") as total_sales FROM "{primary_table}" WHERE "{country_col}" IS NOT NULL GROUP BY "{country_col}" ORDER BY total_sales DESC LIMIT 10'
-                country_result = supabase_agent.execute_query(country_query)
-                if country_result["success"] and country_result["data"]:
-                    rows = country_result["data"]
-                    result["salesByCountry"] = {
-                        "labels": [str(row[country_col]) for row in rows],
-                        "data": [float(row["total_sales"]) for row in rows]
-                    }
-            except Exception as e:
-                print(f"Country chart error: {e}")
+            chart_specs.append((
+                "salesByCountry", "Country",
+                _top_groups_sql(primary_table, country_col, sales_col, "total_sales"),
+                lambda rows: {
+                    "labels": [str(row[country_col]) for row in rows],
+                    "data": [float(row["total_sales"]) for row in rows]
+                },
+                (country_col,), "total_sales",
+            ))
         
         # Monthly trend
         if year_col and month_col and sales_col:
-            try:
-                trend_query = f'SELECT "{year_col}", "{month_col}", SUM("{sales_col}") as monthly_sales FROM "{primary_table}" GROUP BY "{year_col}", "{month_col}" ORDER BY "{year_col}", "{month_col}" LIMIT 50'
-                trend_result = supabase_agent.execute_query(trend_query)
-                if trend_result["success"] and trend_result["data"]:
-                    rows = trend_result["data"]
-                    result["salesTrend"] = {
-                        "labels": [f"{row[year_col]}-{str(row[month_col]).zfill(2)}" for row in rows],
-                        "data": [float(row["monthly_sales"]) for row in rows]
-                    }
-            except Exception as e:
-                print(f"Trend chart error: {e}")
+            chart_specs.append((
+                "salesTrend", "Trend",
+                _trend_sql(primary_table, year_col, month_col, sales_col),
+                lambda rows: {
+                    "labels": [f"{row[year_col]}-{str(row[month_col]).zfill(2)}" for row in rows],
+                    "data": [float(row["monthly_sales"]) for row in rows]
+                },
+                (year_col, month_col), "monthly_sales",
+            ))
         
         # Product distribution
         if product_col and sales_col:
-            try:
-                product_query = f'SELECT "{product_col}", SUM("{sales_col}") as product_sales FROM "{primary_table}" WHERE "{product_col}" IS NOT NULL GROUP BY "{product_col}" ORDER BY product_sales DESC LIMIT 10'
-                product_result = supabase_agent.execute_query(product_query)
-                if product_result["success"] and product_result["data"]:
-                    rows = product_result["data"]
-                    result["productDistribution"] = {
-                        "labels": [str(row[product_col]) for row in rows],
-                        "data": [float(row["product_sales"]) for row in rows]
-                    }
-            except Exception as e:
-                print(f"Product chart error: {e}")
+            chart_specs.append((
+                "productDistribution", "Product",
+                _top_groups_sql(primary_table, product_col, sales_col, "product_sales"),
+                lambda rows: {
+                    "labels": [str(row[product_col]) for row in rows],
+                    "data": [float(row["product_sales"]) for row in rows]
+                },
+                (product_col,), "product_sales",
+            ))
         
         # City performance
         if city_col and sales_col:
-            try:
-                city_query = f'SELECT "{city_col}", SUM("{sales_col}") as city_sales FROM "{primary_table}" WHERE "{city_col}" IS NOT NULL GROUP BY "{city_col}" ORDER BY city_sales DESC LIMIT 10'
-                city_result = supabase_agent.execute_query(city_query)
-                if city_result["success"] and city_result["data"]:
-                    rows = city_result["data"]
-                    result["cityPerformance"] = {
-                        "labels": [str(row[city_col]) for row in rows],
-                        "data": [float(row["city_sales"]) for row in rows]
-                    }
-            except Exception as e:
-                print(f"City chart error: {e}")
+            chart_specs.append((
+                "cityPerformance", "City",
+                _top_groups_sql(primary_table, city_col, sales_col, "city_sales"),
+                lambda rows: {
+                    "labels": [str(row[city_col]) for row in rows],
+                    "data": [float(row["city_sales"]) for row in rows]
+                },
+                (city_col,), "city_sales",
+            ))
+        
+        # Prefer the precomputed aggregate view, then one GROUPING SETS scan,
+        # then concurrent per-chart queries
+        fused = None
+        if len(chart_specs) > 1:
+            fused = await asyncio.to_thread(_materialized_chart_rows, primary_table, sales_col, chart_specs)
+            if fused is None:
+                fused = await asyncio.to_thread(_fused_chart_rows, primary_table, sales_col, chart_specs)
+        
+        if fused is not None:
+            result = {}
+            for key, label, _, build, _, _ in chart_specs:
+                try:
+                    if fused.get(key):
+                        result[key] = build(fused[key])
+                except Exception as e:
+                    print(f"{label} chart error: {e}")
+        else:
+            charts = await asyncio.gather(*(_run_chart_query(*spec[:4]) for spec in chart_specs))
+            result = dict(chart for chart in charts if chart is not None)
         
-        return result
+        return etag_response(request, result)
             
     except Exception as e:
         print(f"Charts error: {str(e)}")
@@ -403,17 +750,18 @@ async def get_dashboard_charts():
 # DATA UPLOAD ENDPOINT
 # ============================================================================
 
+def _save_upload(source, dest_path: str) -> None:
+    """Copy an uploaded file object to disk in 1 MB chunks"""
+    with open(dest_path, "wb") as f:
+        shutil.copyfileobj(source, f, length=1 << 20)
+
 @app.post("/api/upload")
 async def upload_file(file: UploadFile = File(...)):
     """Upload CSV file to Supabase"""
+    temp_path = os.path.join(tempfile.gettempdir(), file.filename)
     try:
-        # Save uploaded file temporarily
-        temp_dir = tempfile.gettempdir()
-        temp_path = os.path.join(temp_dir, file.filename)
-        
-        with open(temp_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        # Stream the upload to disk in chunks instead of buffering it in memory
+        await asyncio.to_thread(_save_upload, file.file, temp_path)
         
         # Generate table name from filename
         table_name = os.path.splitext(file.filename)[0].lower().replace(' ', '_').replace('-', '_')
@@ -421,10 +769,14 @@ async def upload_file(file: UploadFile = File(...)):
         # Upload to Supabase
         result = supabase_agent.upload_csv_to_supabase(temp_path, table_name)
         
-        # Clean up temp file
-        os.remove(temp_path)
-        
         if result["success"]:
+            with schema_cache_lock:
+                schema_cache.clear()
+            response_cache.clear()
+            try:
+                await asyncio.to_thread(sync_chart_views)
+            except Exception as e:
+                logger.warning("Chart view refresh failed: %s", e)
             return {
                 "success": True,
                 "tableName": result["table_name"],
@@ -436,6 +788,10 @@ async def upload_file(file: UploadFile = File(...)):
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload error: {str(e)}")
+    finally:
+        # Clean up temp file
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
 # ============================================================================
 # ANALYSIS ENDPOINT
@@ -455,11 +811,7 @@ async def run_analysis(request: AnalysisRequest):
 
         user_prompt = " ".join(prompt_parts)
         logger.info("LangGraph analysis request (table=%s)", request.table)
-        state = langgraph_agent.run_intelligent_analysis(
-            user_prompt,
-            upload_csvs=False,
-            return_state=True,
-        )
+        state = await analysis_batcher.submit(user_prompt, user_prompt)
         rows = extract_tabular_rows(state, limit=100)
         visualization = build_visualization_payload(state)
         sql_queries = state.get("sql_queries") or []
@@ -470,12 +822,13 @@ async def run_analysis(request: AnalysisRequest):
             state.get("final_response", "Analysis completed."),
         )
 
-        return {
+        # Returning the response directly skips jsonable_encoder on up to 100 rows
+        return ORJSONResponse({
             "data": rows,
             "visualization": visualization,
             "insights": insights_text,
             "query": primary_sql,
-        }
+        })
 
     except HTTPException:
         raise
@@ -494,7 +847,7 @@ async def generate_report(request: ReportGenerateRequest, background_tasks: Back
         task_id = f"report_{datetime.now().timestamp()}"
         
         # Initialize task status
-        background_tasks_status[task_id] = {
+        await state_store.set_task(task_id, {
             "status": "processing",
             "progress": 0,
             "message": "Initializing report generation...",
@@ -502,7 +855,7 @@ async def generate_report(request: ReportGenerateRequest, background_tasks: Back
             "fileName": None,
             "generationTime": 0,
             "analysisSummary": None,
-        }
+        })
         
         # Add background task
         background_tasks.add_task(
@@ -520,39 +873,45 @@ async def generate_report(request: ReportGenerateRequest, background_tasks: Back
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Report generation error: {str(e)}")
 
+async def update_task_status(task_id: str, fields: Dict[str, Any]) -> None:
+    """Persist a task status change and push the new snapshot to SSE listeners"""
+    await state_store.update_task(task_id, fields)
+    listeners = task_subscribers.get(task_id)
+    if listeners:
+        snapshot = dict(await state_store.get_task(task_id) or {})
+        for queue in listeners:
+            queue.put_nowait(snapshot)
+
 async def generate_report_background(task_id: str, query: str):
     """Background task for report generation"""
     try:
         start_time = datetime.now()
         
         # Update progress: Planning
-        background_tasks_status[task_id].update({
+        await update_task_status(task_id, {
             "progress": 10,
             "message": "LLM planning execution..."
         })
 
         try:
             logger.info("LangGraph report planning (task=%s)", task_id)
-            analysis_state = langgraph_agent.run_intelligent_analysis(
-                query,
-                upload_csvs=False,
-                return_state=True,
-            )
-            background_tasks_status[task_id]["analysisSummary"] = analysis_state.get(
-                "final_response",
-                "Analysis completed."
-            )
+            analysis_state = await asyncio.to_thread(_run_langgraph, query)
+            await update_task_status(task_id, {
+                "analysisSummary": analysis_state.get("final_response", "Analysis completed.")
+            })
         except Exception as exc:
             logger.warning("LangGraph report planning failed (task=%s): %s", task_id, exc)
         
         # Generate report
-        report_path = report_generator.create_pdf_report(query)
+        report_path = await asyncio.to_thread(report_generator.create_pdf_report, query)
+        
+        await state_store.set_report_path(os.path.basename(report_path), report_path)
         
         end_time = datetime.now()
         generation_time = int((end_time - start_time).total_seconds())
         
         # Update task status
-        background_tasks_status[task_id].update({
+        await update_task_status(task_id, {
             "status": "completed",
             "progress": 100,
             "message": "Report generated successfully!",
@@ -563,7 +922,7 @@ async def generate_report_background(task_id: str, query: str):
         
     except Exception as e:
         logger.exception("Report generation failed (task=%s)", task_id)
-        background_tasks_status[task_id].update({
+        await update_task_status(task_id, {
             "status": "failed",
             "progress": 0,
             "message": f"Error: {str(e)}"
@@ -572,27 +931,67 @@ async def generate_report_background(task_id: str, query: str):
 @app.get("/api/report/status/{task_id}")
 async def get_report_status(task_id: str):
     """Check report generation status"""
-    if task_id not in background_tasks_status:
+    task = await state_store.get_task(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    return background_tasks_status[task_id]
+    return task
+
+def _sse_event(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+@app.get("/api/report/events/{task_id}")
+async def stream_report_events(task_id: str):
+    """Push report progress as Server-Sent Events until the task finishes"""
+    queue: asyncio.Queue = asyncio.Queue()
+    task_subscribers.setdefault(task_id, []).append(queue)
+
+    def unsubscribe() -> None:
+        listeners = task_subscribers.get(task_id, [])
+        if queue in listeners:
+            listeners.remove(queue)
+        if not listeners:
+            task_subscribers.pop(task_id, None)
+
+    task = await state_store.get_task(task_id)
+    if task is None:
+        unsubscribe()
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    async def events():
+        snapshot = task
+        try:
+            while snapshot:
+                yield _sse_event("progress", snapshot)
+                if snapshot.get("status") in TERMINAL_TASK_STATES:
+                    break
+                try:
+                    snapshot = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Doubles as a keep-alive and catches updates made by another worker
+                    snapshot = await state_store.get_task(task_id)
+        finally:
+            unsubscribe()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.get("/api/report/download/{filename}")
 async def download_report(filename: str):
     """Download generated report"""
-    # Find file in temp directory
-    temp_dir = tempfile.gettempdir()
-    
-    # Search for file in recent temp directories
-    for root, dirs, files in os.walk(temp_dir):
-        if filename in files:
-            file_path = os.path.join(root, filename)
-            return FileResponse(
-                file_path,
-                media_type="application/pdf",
-                filename=filename
-            )
+    file_path = await state_store.get_report_path(filename)
+    if file_path and os.path.exists(file_path):
+        return FileResponse(
+            file_path,
+            media_type="application/pdf",
+            filename=filename
+        )
     
+    # Forget reports whose files have since been cleaned up
+    await state_store.forget_report_path(filename)
     raise HTTPException(status_code=404, detail="Report file not found")
 
 # ============================================================================
@@ -600,76 +999,80 @@ async def download_report(filename: str):
 # ============================================================================
 
 @app.get("/api/tables")
-async def list_tables():
+async def list_tables(request: Request):
     """List all database tables with metadata"""
     try:
-        tables = supabase_agent.list_tables()
-        schema = supabase_agent.get_database_schema()
+        tables, schema = get_cached_schema()
+        row_counts = await asyncio.to_thread(supabase_agent.get_bulk_table_stats, tables)
+        # When the catalog was last read (reset by uploads), so unchanged data keeps its ETag
+        with schema_cache_lock:
+            last_updated = schema_cache.get("loaded_at", "")
         
         table_info = []
         for table in tables:
-            stats = supabase_agent.get_table_stats(table)
             columns = schema.get(table, [])
             
             table_info.append({
                 "name": table,
-                "rowCount": stats.get("row_count", 0),
+                "rowCount": row_counts.get(table, 0),
                 "columns": len(columns),
                 "columnNames": columns,
-                "lastUpdated": datetime.now().isoformat()
+                "lastUpdated": last_updated
             })
         
-        return {"tables": table_info}
+        return etag_response(request, {"tables": table_info})
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Tables error: {str(e)}")
 
 # New endpoint for database schema overview
 @app.get("/api/schema")
-async def get_schema():
+async def get_schema(request: Request):
     """Get complete database schema"""
     try:
-        schema = supabase_agent.get_database_schema()
-        tables = supabase_agent.list_tables()
+        tables, schema = get_cached_schema()
 
-        schema_info = []
-        for table in tables:
-            columns = schema.get(table, [])
-            stats = supabase_agent.get_table_stats(table)
-
-            sample = supabase_agent.get_table_sample(table, limit=1)
-            column_types = {}
-
-            if sample["success"] and sample["data"]:
-                first_row = sample["data"][0]
-                for col in columns:
-                    col_name = col["name"] if isinstance(col, dict) else col
-                    val = first_row.get(col_name)
-                    if isinstance(val, (int, float)):
-                        column_types[col_name] = "numeric"
-                    elif isinstance(val, str) and any(keyword in col_name.lower() for keyword in ['date', 'time']):
-                        column_types[col_name] = "date"
-                    else:
-                        column_types[col_name] = "text"
-
-            schema_info.append({
+        # Row counts and per-table samples are independent round-trips; overlap them
+        row_counts, samples = await asyncio.gather(
+            asyncio.to_thread(supabase_agent.get_bulk_table_stats, tables),
+            asyncio.gather(*(asyncio.to_thread(supabase_agent.get_table_sample, table, 1) for table in tables)),
+        )
+
+        # One (table, column, sample value) row per column across all tables
+        records = []
+        for table, sample in zip(tables, samples):
+            first_row = sample["data"][0] if sample["success"] and sample["data"] else {}
+            for col in schema.get(table, []):
+                col_name = col["name"] if isinstance(col, dict) else col
+                records.append((table, col_name, first_row.get(col_name)))
+
+        # Infer column types for every table in one vectorised pass
+        columns_df = pd.DataFrame(records, columns=["table", "name", "sample"])
+        # Types of the raw samples: the frame would coerce None to NaN next to numbers
+        sample_types = pd.Series([type(sample) for _, _, sample in records], index=columns_df.index, dtype=object)
+        is_numeric = sample_types.isin([int, float, bool])
+        is_date = (sample_types == str) & columns_df["name"].str.contains("date|time", case=False)
+        columns_df["type"] = np.select([is_numeric, is_date], ["numeric", "date"], default="text")
+        columns_by_table = {
+            table: group[["name", "type"]].to_dict("records")
+            for table, group in columns_df.groupby("table", sort=False)
+        }
+
+        schema_info = [
+            {
                 "table": table,
-                "columns": [
-                    {
-                        "name": col["name"] if isinstance(col, dict) else col,
-                        "type": column_types.get(col["name"] if isinstance(col, dict) else col, "text"),
-                    }
-                    for col in columns
-                ],
-                "rowCount": stats.get("row_count", 0)
-            })
+                "columns": columns_by_table.get(table, []),
+                "rowCount": row_counts.get(table, 0)
+            }
+            for table in tables
+        ]
 
-        return {
+        return etag_response(request, {
             "database": "supabase",
             "tables": schema_info,
             "totalTables": len(tables),
-            "totalColumns": sum(len(s.get("columns", [])) for s in schema_info)
-        }
+            "totalColumns": len(columns_df)
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Schema error: {str(e)}")
 
@@ -677,7 +1080,7 @@ async def get_schema():
 async def get_table_info(table_name: str):
     """Get detailed table information with column metadata"""
     try:
-        schema = supabase_agent.get_database_schema()
+        _, schema = get_cached_schema()
         
         if table_name not in schema:
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
@@ -706,7 +1109,7 @@ async def get_table_info(table_name: str):
         else:
             column_info = [{"name": col, "type": "unknown"} for col in schema[table_name]]
         
-        return {
+        return ORJSONResponse({
             "name": table_name,
             "columns": column_info,
             "sampleData": sample["data"] if sample["success"] else [],
@@ -714,7 +1117,7 @@ async def get_table_info(table_name: str):
                 "rowCount": stats.get("row_count", 0),
                 "columnCount": len(schema[table_name])
             }
-        }
+        })
         
     except HTTPException:
         raise
@@ -732,11 +1135,11 @@ async def get_activity():
         activities = []
         
         # Get table information to show as activities
-        tables = supabase_agent.list_tables()
+        tables, _ = get_cached_schema()
+        row_counts = supabase_agent.get_bulk_table_stats(tables)
         
         for i, table in enumerate(tables):
-            stats = supabase_agent.get_table_stats(table)
-            row_count = stats.get("row_count", 0)
+            row_count = row_counts.get(table, 0)
             
             activities.append({
                 "timestamp": f"{(i+1) * 2} min ago",
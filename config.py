@@ -28,3 +28,9 @@ SUPABASE_DB_PASSWORD = os.getenv("SUPABASE_DB_PASSWORD", "")
 LLM_MODEL = os.getenv("LLM_MODEL", "gemini")
 LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.2"))
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+
+# Copy buffer for uploaded files in bytes; 0 picks one from the file size
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", "0"))
+
+# Shared API state (chat history, report tasks); in-memory when unset
+REDIS_URL = os.getenv("REDIS_URL", "")
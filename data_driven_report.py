@@ -7,15 +7,21 @@ Heavy planning -> Real data -> Real analysis -> Real report
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.enums import TA_JUSTIFY, TA_LEFT, TA_CENTER
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Image as RLImage, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Image as RLImage, Table, TableStyle, HRFlowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
 from reportlab.pdfgen import canvas
+from collections import Counter, OrderedDict
 from datetime import datetime
+import atexit
+import hashlib
 import os
+import re
+import shutil
 import tempfile
-import numpy as np
-from agents.chain_of_thought_agent import ChainOfThoughtReportAgent
+import threading
+import uuid
+from itertools import chain
 
 class BoardRoomCanvas(canvas.Canvas):
     def __init__(self, *args, **kwargs):
@@ -59,128 +65,339 @@ class BoardRoomCanvas(canvas.Canvas):
         self.drawCentredString(A4[0]/2, 1.2*cm, f"Page {page_num} of {total_pages}")
         self.drawRightString(A4[0] - 2*cm, 1.2*cm, "Data-Driven Analysis")
 
+# Markdown cleanup patterns for narrative text
+_RE_MD_HEADER = re.compile(r'^#+\s+', re.MULTILINE)
+_RE_BOLD = re.compile(r'\*\*([^\*]+)\*\*')
+_RE_ESCAPED = re.compile(r'\\([n$])')
+_UNESCAPED = {'n': ' ', '$': '$'}
+_CLEAN_TABLE = str.maketrans({'*': None, '_': None})
+
+
+def _unescape(match):
+    return _UNESCAPED[match.group(1)]
+
+
+def _iter_paragraphs(text):
+    """Stripped, non-empty paragraphs of a narrative"""
+    return (para for para in map(str.strip, text.split('\n\n')) if para)
+
+
+def _classify_paragraph(para):
+    """Kind of a narrative paragraph: heading, numbered, bullet, finding or body"""
+    first = para[0]
+    if first == '#':
+        return 'heading'
+    if first.isdigit() and '. ' in para[:5]:
+        return 'numbered'
+    if first == '•' or para.startswith('- '):
+        return 'bullet'
+    if para.isupper() or (para.endswith(':') and len(para) < 80):
+        return 'finding'
+    return 'body'
+
+
+def _format_bullet(para):
+    """Bullet text with a leading 'label:' in bold"""
+    text = para.lstrip('•-').strip()
+    if ':' in text:
+        label, rest = text.split(':', 1)
+        return f"• <b>{label}:</b> {rest}"
+    return f"• {text}"
+
+
+# Separator for body paragraphs merged into one flowable
+_BODY_BREAK = '<br/><br/>'
+
+# Paragraph style for each narrative paragraph kind in content sections
+_KIND_STYLES = {
+    'heading': 'FindingTitle',
+    'numbered': 'Recommendation',
+    'bullet': 'BulletPoint',
+    'finding': 'FindingTitle',
+    'body': 'ExecutiveBody',
+}
+
+
+# First number in a metric value that came back as a raw dict/list
+_RE_NUM = re.compile(r'[\d,]+\.?\d*')
+
+# Identifier-like numeric columns left out of the fallback metrics
+_EXCLUDE_COLS = frozenset({'id', 'ordernumber', 'qtr_id', 'month_id', 'year_id'})
+
+# Column-name fragments that mark a money column in the fallback metrics
+_CURRENCY_KEYWORDS = ('sales', 'price', 'revenue')
+
+# Report palette (parsed once at import)
+_C_TITLE = colors.HexColor('#1a365d')
+_C_SECTION = colors.HexColor('#2c5282')
+_C_BODY = colors.HexColor('#2d3748')
+_C_ACCENT = colors.HexColor('#4299e1')
+_C_HIGHLIGHT_BG = colors.HexColor('#ebf8ff')
+_C_ALERT = colors.HexColor('#e53e3e')
+_C_MUTED = colors.HexColor('#4a5568')
+_C_INK = colors.HexColor('#1a1a1a')
+_C_REQUEST_BG = colors.HexColor('#f8f8f8')
+_ROW_BG = colors.HexColor('#f7fafc')
+_ROW_BORDER = colors.HexColor('#e2e8f0')
+
+# Static part of the metrics table style; row backgrounds and borders are added per table
+_METRICS_TABLE_BASE_STYLE = (
+    ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+    ('FONTNAME', (1,0), (1,-1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0,0), (-1,-1), 11),
+    ('TEXTCOLOR', (0,0), (0,-1), _C_BODY),
+    ('TEXTCOLOR', (1,0), (1,-1), _C_SECTION),
+    ('ALIGN', (0,0), (0,-1), 'LEFT'),
+    ('ALIGN', (1,0), (1,-1), 'RIGHT'),
+    ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+    ('TOPPADDING', (0,0), (-1,-1), 12),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 12),
+    ('LEFTPADDING', (0,0), (-1,-1), 15),
+    ('RIGHTPADDING', (0,0), (-1,-1), 15),
+)
+
+
+def _accent_line(color=_C_ACCENT, width="25%"):
+    """Short rule drawn under section headings"""
+    return HRFlowable(width=width, thickness=2, color=color,
+                      spaceBefore=3, spaceAfter=15, hAlign='LEFT')
+
+
+# Report paragraph styles, added on top of the ReportLab sample stylesheet
+_STYLE_SPECS = (
+    # Professional Report Title
+    {
+        'name': 'ReportTitle',
+        'fontName': 'Helvetica-Bold',
+        'fontSize': 28,
+        'textColor': _C_TITLE,
+        'alignment': TA_LEFT,
+        'spaceBefore': 15,
+        'spaceAfter': 20,
+        'leading': 34,
+        'letterSpacing': 0.5,
+    },
+    # Section Titles with accent line
+    {
+        'name': 'SectionTitle',
+        'fontName': 'Helvetica-Bold',
+        'fontSize': 18,
+        'textColor': _C_SECTION,
+        'spaceBefore': 25,
+        'spaceAfter': 15,
+        'leading': 22,
+        'borderWidth': 0,
+        'borderPadding': 0,
+        'leftIndent': 0,
+    },
+    # Body text - clean and readable
+    {
+        'name': 'ExecutiveBody',
+        'fontName': 'Helvetica',
+        'fontSize': 11,
+        'textColor': _C_BODY,
+        'alignment': TA_JUSTIFY,
+        'spaceBefore': 6,
+        'spaceAfter': 12,
+        'leading': 18,
+        'firstLineIndent': 0,
+    },
+    # Bullet points style
+    {
+        'name': 'BulletPoint',
+        'fontName': 'Helvetica',
+        'fontSize': 11,
+        'textColor': _C_BODY,
+        'alignment': TA_LEFT,
+        'spaceBefore': 4,
+        'spaceAfter': 4,
+        'leading': 16,
+        'leftIndent': 25,
+        'bulletIndent': 10,
+    },
+    # Key Finding Title
+    {
+        'name': 'FindingTitle',
+        'fontName': 'Helvetica-Bold',
+        'fontSize': 13,
+        'textColor': _C_SECTION,
+        'spaceBefore': 12,
+        'spaceAfter': 6,
+        'leading': 16,
+    },
+    # Highlight box for important info
+    {
+        'name': 'HighlightBox',
+        'fontName': 'Helvetica',
+        'fontSize': 11,
+        'textColor': _C_BODY,
+        'alignment': TA_LEFT,
+        'spaceBefore': 10,
+        'spaceAfter': 10,
+        'leading': 16,
+        'leftIndent': 20,
+        'rightIndent': 20,
+        'borderWidth': 1,
+        'borderColor': _C_ACCENT,
+        'borderPadding': 15,
+        'backColor': _C_HIGHLIGHT_BG,
+    },
+    # Recommendation style
+    {
+        'name': 'Recommendation',
+        'fontName': 'Helvetica',
+        'fontSize': 11,
+        'textColor': _C_BODY,
+        'alignment': TA_LEFT,
+        'spaceBefore': 8,
+        'spaceAfter': 12,
+        'leading': 17,
+        'leftIndent': 20,
+        'bulletIndent': 10,
+    },
+    # Cover page: confidential banner, subtitle and the analysis request box
+    {
+        'name': 'Conf',
+        'fontName': 'Helvetica-Bold',
+        'fontSize': 10,
+        'textColor': _C_ALERT,
+        'alignment': TA_LEFT,
+        'spaceBefore': 0,
+        'spaceAfter': 10,
+    },
+    {
+        'name': 'Sub',
+        'fontName': 'Helvetica',
+        'fontSize': 12,
+        'textColor': _C_MUTED,
+        'leading': 20,
+        'spaceAfter': 10,
+    },
+    {
+        'name': 'Req',
+        'fontName': 'Helvetica',
+        'fontSize': 11,
+        'alignment': TA_JUSTIFY,
+        'leftIndent': 25,
+        'rightIndent': 25,
+        'borderWidth': 2,
+        'borderColor': _C_INK,
+        'borderPadding': 15,
+        'backColor': _C_REQUEST_BG,
+        'spaceBefore': 10,
+        'spaceAfter': 20,
+    },
+)
+
+
+def _build_styles():
+    """Sample stylesheet plus the report styles; built once and shared by every generator"""
+    styles = getSampleStyleSheet()
+    for spec in _STYLE_SPECS:
+        styles.add(ParagraphStyle(**spec))
+    return styles
+
+
+_STYLES = _build_styles()
+
+
 class DataDrivenReportGenerator:
     """
     Generates reports from REAL data analysis
     """
     
+    # Analysed requests kept for repeat reports (LRU)
+    REPORT_CACHE_SIZE = 8
+    
+    # Output directory shared by every generator in the process, removed at exit
+    _temp_dir = None
+    _temp_dir_lock = threading.Lock()
+    
     def __init__(self, supabase_agent):
         self.supabase_agent = supabase_agent
-        self.agent = ChainOfThoughtReportAgent(supabase_agent)
-        self.temp_dir = tempfile.mkdtemp()
-        self._setup_styles()
-        
-    def _setup_styles(self):
-        self.styles = getSampleStyleSheet()
-        
-        # Professional Report Title
-        self.styles.add(ParagraphStyle(
-            name='ReportTitle',
-            fontName='Helvetica-Bold',
-            fontSize=28,
-            textColor=colors.HexColor('#1a365d'),
-            alignment=TA_LEFT,
-            spaceBefore=15,
-            spaceAfter=20,
-            leading=34,
-            letterSpacing=0.5
-        ))
-        
-        # Section Titles with accent line
-        self.styles.add(ParagraphStyle(
-            name='SectionTitle',
-            fontName='Helvetica-Bold',
-            fontSize=18,
-            textColor=colors.HexColor('#2c5282'),
-            spaceBefore=25,
-            spaceAfter=15,
-            leading=22,
-            borderWidth=0,
-            borderPadding=0,
-            leftIndent=0
-        ))
-        
-        # Body text - clean and readable
-        self.styles.add(ParagraphStyle(
-            name='ExecutiveBody',
-            fontName='Helvetica',
-            fontSize=11,
-            textColor=colors.HexColor('#2d3748'),
-            alignment=TA_JUSTIFY,
-            spaceBefore=6,
-            spaceAfter=12,
-            leading=18,
-            firstLineIndent=0
-        ))
-        
-        # Bullet points style
-        self.styles.add(ParagraphStyle(
-            name='BulletPoint',
-            fontName='Helvetica',
-            fontSize=11,
-            textColor=colors.HexColor('#2d3748'),
-            alignment=TA_LEFT,
-            spaceBefore=4,
-            spaceAfter=4,
-            leading=16,
-            leftIndent=25,
-            bulletIndent=10
-        ))
+        self._agent = None
+        self._agent_lock = threading.Lock()
+        self.temp_dir = self._get_temp_dir()
+        self.styles = _STYLES
+        self._report_cache = OrderedDict()
+        self._report_cache_lock = threading.Lock()
+        
+    @property
+    def agent(self):
+        """Chain-of-thought agent, created on first report (its imports and schema fetch are slow)"""
+        if self._agent is None:
+            with self._agent_lock:
+                if self._agent is None:
+                    from agents.chain_of_thought_agent import ChainOfThoughtReportAgent
+                    self._agent = ChainOfThoughtReportAgent(self.supabase_agent)
+        return self._agent
+    
+    @classmethod
+    def _get_temp_dir(cls) -> str:
+        with cls._temp_dir_lock:
+            if cls._temp_dir is None:
+                cls._temp_dir = tempfile.mkdtemp(prefix="reports_")
+                atexit.register(cls.cleanup_temp_dir)
+            return cls._temp_dir
+    
+    @classmethod
+    def cleanup_temp_dir(cls):
+        """Delete the shared output directory and every report written to it"""
+        with cls._temp_dir_lock:
+            path, cls._temp_dir = cls._temp_dir, None
+        if path:
+            shutil.rmtree(path, ignore_errors=True)
+    
+    def _get_report_data(self, user_request: str):
+        """Analysis results for a request, memoised per request and data version"""
+        data_version = getattr(self.supabase_agent, 'data_version', 0)
+        key = (hashlib.sha1(user_request.encode('utf-8')).hexdigest(), data_version)
+        
+        with self._report_cache_lock:
+            report_data = self._report_cache.get(key)
+            if report_data is not None:
+                self._report_cache.move_to_end(key)
+                print("♻️ Reusing cached analysis for identical request")
+                return report_data
+        
+        report_data = self._snapshot_charts(self.agent.generate_report(user_request), key)
+        
+        with self._report_cache_lock:
+            self._report_cache[key] = report_data
+            while len(self._report_cache) > self.REPORT_CACHE_SIZE:
+                _, evicted = self._report_cache.popitem(last=False)
+                shutil.rmtree(evicted.get('_chart_dir', ''), ignore_errors=True)
+        
+        return report_data
+    
+    def _snapshot_charts(self, report_data, key):
+        """Copy the agent's charts into a directory owned by this cache entry.
         
-        # Key Finding Title
-        self.styles.add(ParagraphStyle(
-            name='FindingTitle',
-            fontName='Helvetica-Bold',
-            fontSize=13,
-            textColor=colors.HexColor('#2c5282'),
-            spaceBefore=12,
-            spaceAfter=6,
-            leading=16
-        ))
+        The shared agent writes every chart to fixed names (v1.png, ...), so the
+        next request would otherwise overwrite the files a cached entry points to.
+        """
+        chart_dir = os.path.join(self.temp_dir, f"charts_{key[0][:16]}_{key[1]}_{uuid.uuid4().hex[:8]}")
+        os.makedirs(chart_dir, exist_ok=True)
         
-        # Highlight box for important info
-        self.styles.add(ParagraphStyle(
-            name='HighlightBox',
-            fontName='Helvetica',
-            fontSize=11,
-            textColor=colors.HexColor('#2d3748'),
-            alignment=TA_LEFT,
-            spaceBefore=10,
-            spaceAfter=10,
-            leading=16,
-            leftIndent=20,
-            rightIndent=20,
-            borderWidth=1,
-            borderColor=colors.HexColor('#4299e1'),
-            borderPadding=15,
-            backColor=colors.HexColor('#ebf8ff')
-        ))
+        visualizations = {}
+        for viz_id, viz_path in report_data.get('visualizations', {}).items():
+            if os.path.exists(viz_path):
+                visualizations[viz_id] = shutil.copy(viz_path, os.path.join(chart_dir, f"{viz_id}.png"))
         
-        # Recommendation style
-        self.styles.add(ParagraphStyle(
-            name='Recommendation',
-            fontName='Helvetica',
-            fontSize=11,
-            textColor=colors.HexColor('#2d3748'),
-            alignment=TA_LEFT,
-            spaceBefore=8,
-            spaceAfter=12,
-            leading=17,
-            leftIndent=20,
-            bulletIndent=10
-        ))
+        return {**report_data, 'visualizations': visualizations, '_chart_dir': chart_dir}
     
     def create_pdf_report(self, user_request: str) -> str:
         """
         Main entry: Generate complete data-driven report
         """
         
-        # Step 1: Agent performs chain-of-thought analysis
-        report_data = self.agent.generate_report(user_request)
+        # Step 1: Agent performs chain-of-thought analysis (reused for repeat requests)
+        report_data = self._get_report_data(user_request)
         
         # Step 2: Create PDF from real data
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"Executive_Report_{timestamp}.pdf"
+        # Suffix keeps names unique when several reports render in the same second
+        filename = f"Executive_Report_{timestamp}_{uuid.uuid4().hex[:8]}.pdf"
         filepath = os.path.join(self.temp_dir, filename)
         
         doc = SimpleDocTemplate(
@@ -193,33 +410,26 @@ class DataDrivenReportGenerator:
             canvasmaker=BoardRoomCanvas
         )
         
-        story = []
-        
         # MANDATORY STRUCTURE - McKinsey/BCG Consulting Style
-        # 1. Cover page with User Request
-        story.extend(self._create_cover(report_data, user_request))
-        
-        # 2. Executive Summary (single focused paragraph)
-        story.extend(self._create_executive_summary(report_data))
-        
-        # 3. Data Overview (metadata only)
-        story.extend(self._create_data_overview(report_data))
-        
-        # 4. Key Metrics Dashboard
-        story.extend(self._create_metrics_dashboard(report_data))
-        
-        # 5. Problem Identification (links to recommendations)
-        if 'problems' in report_data['narrative_content']:
-            story.extend(self._create_problems_section(report_data))
-        
-        # 6. Performance Analysis
-        # 7. Critical Insights  
-        # 8. Strategic Recommendations
-        story.extend(self._create_content_sections(report_data))
-        
-        # 9. Next Steps for Leadership (Concluding section)
-        if 'next_steps' in report_data['narrative_content']:
-            story.extend(self._create_next_steps_section(report_data))
+        # Each section builder yields its flowables; the story is materialised once
+        story = list(chain(
+            # 1. Cover page with User Request
+            self._create_cover(report_data, user_request),
+            # 2. Executive Summary (single focused paragraph)
+            self._create_executive_summary(report_data),
+            # 3. Data Overview (metadata only)
+            self._create_data_overview(report_data),
+            # 4. Key Metrics Dashboard
+            self._create_metrics_dashboard(report_data),
+            # 5. Problem Identification (links to recommendations; empty when absent)
+            self._create_problems_section(report_data),
+            # 6. Performance Analysis
+            # 7. Critical Insights
+            # 8. Strategic Recommendations
+            self._create_content_sections(report_data),
+            # 9. Next Steps for Leadership (Concluding section; empty when absent)
+            self._create_next_steps_section(report_data),
+        ))
         
         # Build PDF with validation
         self._validate_no_duplication(report_data)
@@ -230,26 +440,18 @@ class DataDrivenReportGenerator:
         return filepath
     
     def _create_cover(self, report_data, user_request):
-        content = []
-        
         # Confidential header
-        conf_style = ParagraphStyle(
-            'Conf', fontName='Helvetica-Bold', fontSize=10,
-            textColor=colors.HexColor('#e53e3e'), alignment=TA_LEFT,
-            spaceBefore=0, spaceAfter=10
-        )
-        content.append(Paragraph("CONFIDENTIAL - EXECUTIVE USE ONLY", conf_style))
+        yield Paragraph("CONFIDENTIAL - EXECUTIVE USE ONLY", self.styles['Conf'])
         
         # Add accent line
-        from reportlab.platypus import HRFlowable
-        content.append(HRFlowable(width="100%", thickness=3, color=colors.HexColor('#2c5282'), 
-                                 spaceBefore=5, spaceAfter=15))
+        yield HRFlowable(width="100%", thickness=3, color=_C_SECTION,
+                         spaceBefore=5, spaceAfter=15)
         
-        content.append(Spacer(1, 0.6*inch))
+        yield Spacer(1, 0.6*inch)
         
         # Title with better styling
         title = report_data['title']
-        content.append(Paragraph(title, self.styles['ReportTitle']))
+        yield Paragraph(title, self.styles['ReportTitle'])
         
         # Subtitle with icon-like element
         subtitle = f"""<font color='#4a5568'>
@@ -257,95 +459,64 @@ class DataDrivenReportGenerator:
         📊 Generated: {datetime.now().strftime('%B %d, %Y')}<br/>
         🔍 Powered by Advanced Analytics AI
         </font>"""
-        sub_style = ParagraphStyle(
-            'Sub', fontName='Helvetica', fontSize=12,
-            textColor=colors.HexColor('#4a5568'), leading=20, spaceAfter=10
-        )
-        content.append(Paragraph(subtitle, sub_style))
-        content.append(Spacer(1, 0.4*inch))
+        yield Paragraph(subtitle, self.styles['Sub'])
+        yield Spacer(1, 0.4*inch)
         
         # User request box with better styling
         request_text = f"""<para alignment='justify'>
         <font color='#2c5282'><b>ANALYSIS REQUEST</b></font><br/>
         <font color='#2d3748'>{user_request}</font>
         </para>"""
-        req_style = ParagraphStyle(
-            'Req', fontName='Helvetica', fontSize=11,
-            alignment=TA_JUSTIFY, leftIndent=25, rightIndent=25,
-            borderWidth=2, borderColor=colors.HexColor('#1a1a1a'),
-            borderPadding=15, backColor=colors.HexColor('#f8f8f8'),
-            spaceBefore=10, spaceAfter=20
-        )
-        content.append(Paragraph(request_text, req_style))
-        
-        content.append(PageBreak())
+        yield Paragraph(request_text, self.styles['Req'])
         
-        return content
+        yield PageBreak()
     
     def _create_executive_summary(self, report_data):
-        content = []
-        
-        content.append(Paragraph("EXECUTIVE SUMMARY", self.styles['SectionTitle']))
-        from reportlab.platypus import HRFlowable
-        content.append(HRFlowable(width="25%", thickness=2, color=colors.HexColor('#4299e1'),
-                                 spaceBefore=3, spaceAfter=15, hAlign='LEFT'))
-        
         exec_summary = report_data['narrative_content'].get('executive_summary', '')
+        if not exec_summary:
+            return
         
-        if exec_summary:
-            exec_summary = self._clean_narrative_text(exec_summary)
-            paragraphs = exec_summary.split('\n\n')
-            for para in paragraphs:
-                para = para.strip()
-                if para and not para.startswith('#'):
-                    content.append(Paragraph(para, self.styles['ExecutiveBody']))
+        yield Paragraph("EXECUTIVE SUMMARY", self.styles['SectionTitle'])
+        yield _accent_line()
         
-        content.append(Spacer(1, 0.2*inch))
+        exec_summary = self._clean_narrative_text(exec_summary)
+        for para in _iter_paragraphs(exec_summary):
+            if _classify_paragraph(para) != 'heading':
+                yield Paragraph(para, self.styles['ExecutiveBody'])
         
-        return content
+        yield Spacer(1, 0.2*inch)
     
     def _create_data_overview(self, report_data):
         """Data overview section"""
-        content = []
-        
-        content.append(Paragraph("DATA OVERVIEW", self.styles['SectionTitle']))
-        from reportlab.platypus import HRFlowable
-        content.append(HRFlowable(width="25%", thickness=2, color=colors.HexColor('#4299e1'),
-                                 spaceBefore=3, spaceAfter=15, hAlign='LEFT'))
+        yield Paragraph("DATA OVERVIEW", self.styles['SectionTitle'])
+        yield _accent_line()
         
         data_overview = report_data['narrative_content'].get('data_overview', '')
         
         if data_overview:
             data_overview = self._clean_narrative_text(data_overview)
-            paragraphs = data_overview.split('\n\n')
-            for para in paragraphs:
-                para = para.strip()
-                if para and not para.startswith('#'):
-                    content.append(Paragraph(para, self.styles['ExecutiveBody']))
+            for para in _iter_paragraphs(data_overview):
+                if _classify_paragraph(para) != 'heading':
+                    yield Paragraph(para, self.styles['ExecutiveBody'])
         else:
             # Generate basic overview from datasets
             datasets = report_data.get('datasets', {})
-            total_records = sum(len(df) for df in datasets.values())
+            total_records = sum(map(len, datasets.values()))
+            dataset_count = len(datasets)
             
             overview_text = f"""
-This analysis is based on {total_records:,} records from {len(datasets)} dataset(s). 
+This analysis is based on {total_records:,} records from {dataset_count} dataset(s). 
 The data has been extracted, validated, and analyzed to provide comprehensive insights 
 supporting strategic decision-making.
 """
-            content.append(Paragraph(overview_text.strip(), self.styles['ExecutiveBody']))
+            yield Paragraph(overview_text.strip(), self.styles['ExecutiveBody'])
         
-        content.append(Spacer(1, 0.2*inch))
-        
-        return content
+        yield Spacer(1, 0.2*inch)
     
     def _create_recommendations_section(self, report_data):
         """Recommendations section"""
-        content = []
-        
-        content.append(Paragraph("STRATEGIC RECOMMENDATIONS", self.styles['SectionTitle']))
-        from reportlab.platypus import HRFlowable
-        content.append(HRFlowable(width="25%", thickness=2, color=colors.HexColor('#4299e1'),
-                                 spaceBefore=3, spaceAfter=15, hAlign='LEFT'))
+        yield Paragraph("STRATEGIC RECOMMENDATIONS", self.styles['SectionTitle'])
+        yield _accent_line()
         
         # Check if there's a recommendations narrative
         narratives = report_data.get('narrative_content', {})
@@ -359,17 +530,17 @@ supporting strategic decision-making.
                     narrative = narratives[section['section_id']]
                     if narrative:
                         narrative = self._clean_narrative_text(narrative)
-                        paragraphs = narrative.split('\n\n')
-                        for para in paragraphs:
-                            para = para.strip()
-                            if para and not para.startswith('#'):
-                                # Check if numbered item for better formatting
-                                if len(para) > 0 and para[0].isdigit() and '. ' in para[:5]:
-                                    # Just use the para as-is since _clean_narrative_text already handled the bold
-                                    content.append(Paragraph(para, self.styles['Recommendation']))
-                                    content.append(Spacer(1, 0.12*inch))
-                                else:
-                                    content.append(Paragraph(para, self.styles['ExecutiveBody']))
+                        for para in _iter_paragraphs(narrative):
+                            kind = _classify_paragraph(para)
+                            if kind == 'heading':
+                                continue
+                            # Numbered items get the recommendation style for better formatting
+                            if kind == 'numbered':
+                                # Just use the para as-is since _clean_narrative_text already handled the bold
+                                yield Paragraph(para, self.styles['Recommendation'])
+                                yield Spacer(1, 0.12*inch)
+                            else:
+                                yield Paragraph(para, self.styles['ExecutiveBody'])
                 has_recommendations = True
                 break
         
@@ -387,19 +558,13 @@ showing below-average performance, with specific KPIs for measuring progress.
 <b>3. Implement Data-Driven Decision Making:</b> Establish regular review cycles using these 
 metrics to track performance and adjust strategies accordingly.
 """
-            content.append(Paragraph(rec_text.strip(), self.styles['ExecutiveBody']))
-        
-        content.append(Spacer(1, 0.2*inch))
+            yield Paragraph(rec_text.strip(), self.styles['ExecutiveBody'])
         
-        return content
+        yield Spacer(1, 0.2*inch)
     
     def _create_metrics_dashboard(self, report_data):
-        content = []
-        
-        content.append(Paragraph("KEY PERFORMANCE METRICS", self.styles['SectionTitle']))
-        from reportlab.platypus import HRFlowable
-        content.append(HRFlowable(width="25%", thickness=2, color=colors.HexColor('#4299e1'),
-                                 spaceBefore=3, spaceAfter=15, hAlign='LEFT'))
+        yield Paragraph("KEY PERFORMANCE METRICS", self.styles['SectionTitle'])
+        yield _accent_line()
         
         analysis_results = report_data.get('analysis_results', {})
         datasets = report_data.get('datasets', {})
@@ -418,11 +583,10 @@ metrics to track performance and adjust strategies accordingly.
                 # If it looks like a dict/list (contains { or [), skip it or clean it
                 if '{' in metric_value_str or '[' in metric_value_str:
                     # Try to extract just the numeric part if possible
-                    import re
-                    numbers = re.findall(r'[\d,]+\.?\d*', metric_value_str)
-                    if numbers:
+                    number = _RE_NUM.search(metric_value_str)
+                    if number:
                         # Use first meaningful number
-                        metric_value_str = numbers[0]
+                        metric_value_str = number.group()
                     else:
                         # Skip this metric if we can't clean it
                         continue
@@ -436,29 +600,36 @@ metrics to track performance and adjust strategies accordingly.
         # If still no metrics, calculate from datasets directly
         if not metrics_data and datasets:
             for dataset_id, df in datasets.items():
-                numeric_cols = df.select_dtypes(include=[np.number]).columns
+                numeric_cols = df.select_dtypes(include='number').columns
                 
-                for col in list(numeric_cols)[:6]:  # Top 6 numeric columns
-                    if col.lower() not in ['id', 'ordernumber', 'qtr_id', 'month_id', 'year_id']:
-                        col_sum = float(df[col].sum())
-                        col_avg = float(df[col].mean())
-                        
-                        metric_name = f"Total {col.replace('_', ' ').title()}"
-                        if 'sales' in col.lower() or 'price' in col.lower() or 'revenue' in col.lower():
-                            formatted_value = f"${col_sum:,.2f}"
-                        else:
-                            formatted_value = f"{col_sum:,.0f}"
-                        
-                        metrics_data.append([metric_name, formatted_value])
-                        
-                        # Add average too
-                        avg_name = f"Average {col.replace('_', ' ').title()}"
-                        if 'sales' in col.lower() or 'price' in col.lower() or 'revenue' in col.lower():
-                            avg_formatted = f"${col_avg:,.2f}"
-                        else:
-                            avg_formatted = f"{col_avg:,.2f}"
-                        
-                        metrics_data.append([avg_name, avg_formatted])
+                # Top 6 numeric columns, minus identifiers; sums and means in one reduction
+                cols = [col for col in list(numeric_cols)[:6] if col.lower() not in _EXCLUDE_COLS]
+                if not cols:
+                    continue
+                totals = df[cols].agg(['sum', 'mean'])
+                
+                # Classify each column once: money columns get a currency format
+                currency_cols = {
+                    col for col in cols
+                    if any(keyword in col.lower() for keyword in _CURRENCY_KEYWORDS)
+                }
+                
+                for col in cols:
+                    col_sum = float(totals.at['sum', col])
+                    col_avg = float(totals.at['mean', col])
+                    pretty = col.replace('_', ' ').title()
+                    
+                    if col in currency_cols:
+                        formatted_value = f"${col_sum:,.2f}"
+                        avg_formatted = f"${col_avg:,.2f}"
+                    else:
+                        formatted_value = f"{col_sum:,.0f}"
+                        avg_formatted = f"{col_avg:,.2f}"
+                    
+                    metrics_data.append([f"Total {pretty}", formatted_value])
+                    
+                    # Add average too
+                    metrics_data.append([f"Average {pretty}", avg_formatted])
         
         if metrics_data:
                 # Limit to top 12 metrics for readability
@@ -467,92 +638,79 @@ metrics to track performance and adjust strategies accordingly.
                 metrics_table = Table(metrics_data, colWidths=[3.5*inch, 2*inch])
                 
                 # Alternating row colors for better readability
-                table_style = [
-                    ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-                    ('FONTNAME', (1,0), (1,-1), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0,0), (-1,-1), 11),
-                    ('TEXTCOLOR', (0,0), (0,-1), colors.HexColor('#2d3748')),
-                    ('TEXTCOLOR', (1,0), (1,-1), colors.HexColor('#2c5282')),
-                    ('ALIGN', (0,0), (0,-1), 'LEFT'),
-                    ('ALIGN', (1,0), (1,-1), 'RIGHT'),
-                    ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-                    ('TOPPADDING', (0,0), (-1,-1), 12),
-                    ('BOTTOMPADDING', (0,0), (-1,-1), 12),
-                    ('LEFTPADDING', (0,0), (-1,-1), 15),
-                    ('RIGHTPADDING', (0,0), (-1,-1), 15),
-                ]
+                table_style = list(_METRICS_TABLE_BASE_STYLE)
                 
                 # Add alternating row backgrounds
                 for i in range(len(metrics_data)):
                     if i % 2 == 0:
-                        table_style.append(('BACKGROUND', (0,i), (-1,i), colors.HexColor('#f7fafc')))
+                        table_style.append(('BACKGROUND', (0,i), (-1,i), _ROW_BG))
                     # Add bottom border for each row
-                    table_style.append(('LINEBELOW', (0,i), (-1,i), 0.5, colors.HexColor('#e2e8f0')))
+                    table_style.append(('LINEBELOW', (0,i), (-1,i), 0.5, _ROW_BORDER))
                 
                 # Bold top border
-                table_style.append(('LINEABOVE', (0,0), (-1,0), 2, colors.HexColor('#2c5282')))
-                table_style.append(('LINEBELOW', (0,-1), (-1,-1), 2, colors.HexColor('#2c5282')))
+                table_style.append(('LINEABOVE', (0,0), (-1,0), 2, _C_SECTION))
+                table_style.append(('LINEBELOW', (0,-1), (-1,-1), 2, _C_SECTION))
                 
                 metrics_table.setStyle(TableStyle(table_style))
-                content.append(metrics_table)
+                yield metrics_table
         
-        content.append(Spacer(1, 0.2*inch))
-        
-        return content
+        yield Spacer(1, 0.2*inch)
     
     def _clean_narrative_text(self, text):
         """Clean narrative text by removing markdown and fixing special characters"""
-        import re
-        
         # Remove markdown headers (##, ###, etc.) at start of lines
-        text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)
+        text = _RE_MD_HEADER.sub('', text)
         
         # Fix **bold** markers - convert to <b>bold</b>
         # Use a more careful approach to avoid nesting issues
-        text = re.sub(r'\*\*([^\*]+)\*\*', r'<b>\1</b>', text)
-        
-        # Fix escaped dollar signs \\$ -> $
-        text = text.replace('\\$', '$')
+        text = _RE_BOLD.sub(r'<b>\1</b>', text)
         
-        # Fix escaped characters
-        text = text.replace('\\n', ' ')
+        # Fix escaped characters (\\$ -> $, \\n -> space) in one pass
+        text = _RE_ESCAPED.sub(_unescape, text)
         
         # Remove any remaining markdown-style emphasis
-        text = text.replace('*', '')
-        text = text.replace('_', '')
+        text = text.translate(_CLEAN_TABLE)
         
         return text.strip()
     
     def _create_content_sections(self, report_data):
-        content = []
-        
         sections = report_data['execution_plan'].get('report_sections', [])
         narratives = report_data.get('narrative_content', {})
-        visualizations = report_data.get('visualizations', {})
+        # Stat each chart file once, however many sections reference it
+        visualizations = {
+            viz_id: viz_path
+            for viz_id, viz_path in report_data.get('visualizations', {}).items()
+            if os.path.exists(viz_path)
+        }
+        
+        # Bind styles once for the per-paragraph loop
+        styles = self.styles
+        section_style = styles['SectionTitle']
+        kind_styles = {kind: styles[name] for kind, name in _KIND_STYLES.items()}
+        body_style = kind_styles['body']
+        clean_text = self._clean_narrative_text
         
         for section in sections:
             section_id = section['section_id']
             section_title = section['title']
             
             # Section header with accent line
-            content.append(Paragraph(section_title.upper(), self.styles['SectionTitle']))
-            from reportlab.platypus import HRFlowable
-            content.append(HRFlowable(width="25%", thickness=2, color=colors.HexColor('#4299e1'),
-                                     spaceBefore=3, spaceAfter=15, hAlign='LEFT'))
+            yield Paragraph(section_title.upper(), section_style)
+            yield _accent_line()
             
             # Process content items in order
             for content_item in section.get('content', []):
                 if content_item.startswith('visualization:'):
                     viz_id = content_item.split(':')[1]
-                    if viz_id in visualizations:
-                        viz_path = visualizations[viz_id]
-                        if os.path.exists(viz_path):
-                            try:
-                                img = RLImage(viz_path, width=6.5*inch, height=4*inch)
-                                content.append(img)
-                                content.append(Spacer(1, 0.15*inch))
-                            except Exception as e:
-                                print(f"⚠ Could not embed {viz_id}: {e}")
+                    viz_path = visualizations.get(viz_id)
+                    if viz_path:
+                        try:
+                            img = RLImage(viz_path, width=6.5*inch, height=4*inch)
+                        except Exception as e:
+                            print(f"⚠ Could not embed {viz_id}: {e}")
+                        else:
+                            yield img
+                            yield Spacer(1, 0.15*inch)
                 
                 elif content_item.startswith('narrative:'):
                     # Add section narrative with enhanced formatting
@@ -560,157 +718,124 @@ metrics to track performance and adjust strategies accordingly.
                         narrative = narratives[section_id]
                         if narrative:
                             # FIRST: Clean all markdown formatting
-                            narrative = self._clean_narrative_text(narrative)
+                            narrative = clean_text(narrative)
                             
-                            # Split into paragraphs
-                            paragraphs = narrative.split('\n\n')
-                            for para in paragraphs:
-                                para = para.strip()
-                                if not para:
+                            # Consecutive body paragraphs share one flowable to cut layout work
+                            body_run = []
+                            for para in _iter_paragraphs(narrative):
+                                kind = _classify_paragraph(para)
+                                if kind == 'body':
+                                    body_run.append(para)
                                     continue
+                                if body_run:
+                                    yield Paragraph(_BODY_BREAK.join(body_run), body_style)
+                                    body_run = []
                                 
-                                # Check if it starts with markdown heading (###, ##, #)
-                                if para.startswith('#'):
+                                if kind == 'heading':
                                     # Remove the # markers and treat as heading
                                     para = para.lstrip('#').strip()
-                                    if para:
-                                        content.append(Paragraph(para, self.styles['FindingTitle']))
-                                    continue
-                                
-                                # Check if it's a numbered list item
-                                if len(para) > 0 and para[0].isdigit() and '. ' in para[:5]:
-                                    # Don't add extra formatting - text is already cleaned with <b> tags
-                                    content.append(Paragraph(para, self.styles['Recommendation']))
-                                    content.append(Spacer(1, 0.12*inch))
-                                
-                                # Check if it's a bullet point (- or •)
-                                elif para.startswith('•') or para.startswith('- '):
-                                    bullet_text = para.lstrip('•-').strip()
+                                    if not para:
+                                        continue
+                                elif kind == 'bullet':
                                     # Format bullet with bold if it has a colon
-                                    if ':' in bullet_text:
-                                        parts = bullet_text.split(':', 1)
-                                        formatted = f"• <b>{parts[0]}:</b> {parts[1]}"
-                                        content.append(Paragraph(formatted, self.styles['BulletPoint']))
-                                    else:
-                                        content.append(Paragraph(f"• {bullet_text}", self.styles['BulletPoint']))
-                                
-                                # Check if it's a heading (all caps or ends with colon)
-                                elif para.isupper() or (para.endswith(':') and len(para) < 80):
-                                    content.append(Paragraph(para, self.styles['FindingTitle']))
+                                    para = _format_bullet(para)
                                 
-                                # Regular paragraph
-                                else:
-                                    content.append(Paragraph(para, self.styles['ExecutiveBody']))
+                                # Numbered items are already cleaned with <b> tags
+                                yield Paragraph(para, kind_styles[kind])
+                                if kind == 'numbered':
+                                    yield Spacer(1, 0.12*inch)
                             
-                            content.append(Spacer(1, 0.1*inch))
+                            if body_run:
+                                yield Paragraph(_BODY_BREAK.join(body_run), body_style)
+                            
+                            yield Spacer(1, 0.1*inch)
                 
                 elif content_item.startswith('analysis:'):
                     # Analysis results already in metrics dashboard
                     pass
             
-            content.append(Spacer(1, 0.15*inch))
-        
-        return content
+            yield Spacer(1, 0.15*inch)
     
     def _create_problems_section(self, report_data):
         """Problem Identification section"""
-        content = []
-        
-        content.append(Paragraph("PROBLEM IDENTIFICATION", self.styles['SectionTitle']))
-        from reportlab.platypus import HRFlowable
-        content.append(HRFlowable(width="25%", thickness=2, color=colors.HexColor('#4299e1'),
-                                 spaceBefore=3, spaceAfter=15, hAlign='LEFT'))
-        
         problems = report_data['narrative_content'].get('problems', '')
-        
-        if problems:
-            problems = self._clean_narrative_text(problems)
-            paragraphs = problems.split('\n\n')
-            for para in paragraphs:
-                para = para.strip()
-                if para and not para.startswith('#'):
-                    # Check for problem numbering
-                    if 'Problem' in para and ':' in para:
-                        content.append(Paragraph(para, self.styles['FindingTitle']))
-                    elif para.startswith('-') or para.startswith('•'):
-                        bullet_text = para[1:].strip()
-                        content.append(Paragraph(f"• {bullet_text}", self.styles['BulletPoint']))
-                    else:
-                        content.append(Paragraph(para, self.styles['ExecutiveBody']))
-            
-            content.append(Spacer(1, 0.2*inch))
-        
-        return content
+        if not problems:
+            return
+        
+        yield Paragraph("PROBLEM IDENTIFICATION", self.styles['SectionTitle'])
+        yield _accent_line()
+        
+        problems = self._clean_narrative_text(problems)
+        for para in _iter_paragraphs(problems):
+            kind = _classify_paragraph(para)
+            if kind == 'heading':
+                continue
+            # Check for problem numbering
+            if 'Problem' in para and ':' in para:
+                yield Paragraph(para, self.styles['FindingTitle'])
+            elif kind == 'bullet':
+                bullet_text = para[1:].strip()
+                yield Paragraph(f"• {bullet_text}", self.styles['BulletPoint'])
+            else:
+                yield Paragraph(para, self.styles['ExecutiveBody'])
+        
+        yield Spacer(1, 0.2*inch)
     
     def _create_next_steps_section(self, report_data):
         """Next Steps for Leadership concluding section"""
-        content = []
-        
-        content.append(PageBreak())
-        content.append(Paragraph("NEXT STEPS FOR LEADERSHIP", self.styles['SectionTitle']))
-        from reportlab.platypus import HRFlowable
-        content.append(HRFlowable(width="25%", thickness=2, color=colors.HexColor('#e53e3e'),
-                                 spaceBefore=3, spaceAfter=15, hAlign='LEFT'))
-        
         next_steps = report_data['narrative_content'].get('next_steps', '')
-        
-        if next_steps:
-            next_steps = self._clean_narrative_text(next_steps)
-            paragraphs = next_steps.split('\n\n')
-            for para in paragraphs:
-                para = para.strip()
-                if para and not para.startswith('#'):
-                    # Check for section headers (all caps or ends with colon)
-                    if para.isupper() or (para.endswith(':') and len(para) < 80):
-                        content.append(Paragraph(para, self.styles['FindingTitle']))
-                    elif para.startswith('-') or para.startswith('•'):
-                        bullet_text = para[1:].strip()
-                        # Format bullet with bold if it has a colon
-                        if ':' in bullet_text:
-                            parts = bullet_text.split(':', 1)
-                            formatted = f"• <b>{parts[0]}:</b> {parts[1]}"
-                            content.append(Paragraph(formatted, self.styles['BulletPoint']))
-                        else:
-                            content.append(Paragraph(f"• {bullet_text}", self.styles['BulletPoint']))
-                    else:
-                        content.append(Paragraph(para, self.styles['ExecutiveBody']))
-            
-            content.append(Spacer(1, 0.2*inch))
-        
-        return content
+        if not next_steps:
+            return
+        
+        yield PageBreak()
+        yield Paragraph("NEXT STEPS FOR LEADERSHIP", self.styles['SectionTitle'])
+        yield _accent_line(_C_ALERT)
+        
+        next_steps = self._clean_narrative_text(next_steps)
+        for para in _iter_paragraphs(next_steps):
+            kind = _classify_paragraph(para)
+            if kind == 'heading':
+                continue
+            # Section headers (all caps or ends with colon) win over numbering/bullets here
+            if para.isupper() or (para.endswith(':') and len(para) < 80):
+                yield Paragraph(para, self.styles['FindingTitle'])
+            elif kind == 'bullet':
+                # Format bullet with bold if it has a colon
+                yield Paragraph(_format_bullet(para), self.styles['BulletPoint'])
+            else:
+                yield Paragraph(para, self.styles['ExecutiveBody'])
+        
+        yield Spacer(1, 0.2*inch)
     
     def _validate_no_duplication(self, report_data):
         """Validate report has no duplicate sections or repeated content"""
         narratives = report_data.get('narrative_content', {})
         
         # Check for duplicate sections
-        section_titles = []
+        section_titles = set()
         for section in report_data.get('execution_plan', {}).get('report_sections', []):
             title = section['title']
             if title in section_titles:
                 print(f"⚠ WARNING: Duplicate section detected: {title}")
-            section_titles.append(title)
-        
-        # Check for repeated long phrases (possible copy-paste)
-        all_text = ' '.join([str(v) for v in narratives.values()])
-        
-        # Simple check: if same sentence appears multiple times
-        sentences = all_text.split('. ')
-        seen_sentences = {}
-        for sentence in sentences:
-            if len(sentence) > 50:  # Only check substantial sentences
-                clean = sentence.strip().lower()
-                if clean in seen_sentences:
-                    seen_sentences[clean] += 1
-                else:
-                    seen_sentences[clean] = 1
-        
-        duplicates = {k: v for k, v in seen_sentences.items() if v > 1}
+            section_titles.add(title)
+        
+        # Check for repeated long phrases (possible copy-paste): stream each
+        # narrative's sentences and keep only hashes, not the sentence text
+        sentence_hashes = (
+            hash(sentence.strip().lower())
+            for narrative in narratives.values()
+            for sentence in str(narrative).split('. ')
+            if len(sentence) > 50  # Only check substantial sentences
+        )
+        # Counter tallies in C; one pass over the counts finds the repeats
+        duplicates = sum(1 for count in Counter(sentence_hashes).values() if count > 1)
+        
         if duplicates:
-            print(f"⚠ WARNING: {len(duplicates)} repeated sentences detected in report")
+            print(f"⚠ WARNING: {duplicates} repeated sentences detected in report")
         
         print("✓ Report validation complete")
 
+
 # Compatibility
 CEOGradeReportGenerator = DataDrivenReportGenerator
 ProfessionalPDFReportGenerator = DataDrivenReportGenerator
@@ -1,9 +1,13 @@
 # db/__init__.py
 
+from functools import lru_cache
+
 from config import DB_BACKEND
 from db.sqlite_db import SQLiteDB
 
+@lru_cache(maxsize=None)
 def get_db():
+    """Process-wide database handle; every caller shares one client/connection"""
     if DB_BACKEND == "sqlite":
         return SQLiteDB()
     elif DB_BACKEND == "supabase":
@@ -2,6 +2,7 @@
 # db/base_db.py
 
 from abc import ABC, abstractmethod
+from typing import Optional
 
 class BaseDB(ABC):
     @abstractmethod
@@ -9,12 +10,12 @@ class BaseDB(ABC):
         pass
 
     @abstractmethod
-    def execute(self, query: str):
+    def execute(self, query: str, limit: Optional[int] = None):
         """
-        Execute a query.
+        Execute a query, reading at most `limit` rows when given.
         Returns: dict with keys:
             - success (bool)
-            - rows (list of dict)
+            - rows (list of row tuples in `columns` order, or list of dict)
             - columns (list of str)
             - error (str, if any)
         """
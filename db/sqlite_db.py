@@ -1,30 +1,68 @@
 # SQLite implementation
 # db/sqlite_db.py
 
+import re
 import sqlite3
+import threading
+from itertools import groupby
+from operator import itemgetter
+from typing import Optional
 from db.base_db import BaseDB
 from config import SQLITE_PATH
 
+# WAL lets readers run alongside a writer; NORMAL sync is durable enough under WAL
+PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;
+PRAGMA cache_size=-65536;
+"""
+
+# Statements that change the schema and so invalidate the cached one
+DDL_RE = re.compile(r"^\s*(CREATE|DROP|ALTER)\b", re.IGNORECASE)
+
+# All user tables and their columns in one round-trip, grouped by table in column order
+SCHEMA_QUERY = """
+SELECT m.name AS table_name, p.name AS col_name
+FROM sqlite_master m JOIN pragma_table_info(m.name) p
+WHERE m.type = 'table'
+ORDER BY m.name, p.cid
+"""
+
 class SQLiteDB(BaseDB):
     def __init__(self, path=SQLITE_PATH):
         self.path = path
         self.conn = None
+        self._cursor = None
+        self._schema = None
+        # One shared connection/cursor (get_db() is a singleton), so serialise access
+        self._lock = threading.Lock()
 
     def connect(self):
-        self.conn = sqlite3.connect(self.path)
-        self.conn.row_factory = sqlite3.Row
+        if self.conn is not None:
+            return
+        # Plain tuple rows: column names are returned once, not repeated per row
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.executescript(PRAGMAS)
+        self._cursor = self.conn.cursor()
 
-    def execute(self, query: str):
+    def execute(self, query: str, limit: Optional[int] = None):
         if self.conn is None:
             self.connect()
-        cursor = self.conn.cursor()
+        cursor = self._cursor
         try:
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            columns = rows[0].keys() if rows else []
+            with self._lock:
+                cursor.execute(query)
+                if DDL_RE.match(query):
+                    # Invalidate once the change is visible, so no reader re-caches the old schema
+                    self._schema = None
+                # fetchmany stops stepping the statement, so unread rows are never built
+                rows = cursor.fetchmany(limit) if limit else cursor.fetchall()
+                columns = [d[0] for d in cursor.description] if cursor.description else []
             return {
                 "success": True,
-                "rows": [dict(r) for r in rows],
+                "rows": rows,
                 "columns": columns,
                 "error": None
             }
@@ -37,16 +75,16 @@ class SQLiteDB(BaseDB):
             }
 
     def get_schema(self):
+        if self._schema is not None:
+            return self._schema
         if self.conn is None:
             self.connect()
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT name FROM sqlite_master WHERE type='table';"
-        )
-        tables = [row[0] for row in cursor.fetchall()]
-        schema = {}
-        for table in tables:
-            cursor.execute(f"PRAGMA table_info({table})")
-            cols = [col[1] for col in cursor.fetchall()]
-            schema[table] = cols
+        with self._lock:
+            self._cursor.execute(SCHEMA_QUERY)
+            rows = self._cursor.fetchall()
+            schema = {
+                table: [col for _, col in group]
+                for table, group in groupby(rows, key=itemgetter(0))
+            }
+            self._schema = schema
         return schema
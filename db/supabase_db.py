@@ -1,22 +1,32 @@
 # db/supabase_db.py
 
+import time
+from typing import Optional
+
 from db.base_db import BaseDB
 from config import SUPABASE_URL, SUPABASE_KEY, SUPABASE_SCHEMA
 from supabase import create_client, Client
 
 class SupabaseDB(BaseDB):
+    SCHEMA_CACHE_TTL = 300  # seconds
+
     def __init__(self):
         self.client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        self._schema_cache = None
+        self._schema_ts = 0.0
 
     def connect(self):
         # Supabase client is ready on init, nothing else required
         pass
 
-    def execute(self, query: str):
+    def execute(self, query: str, limit: Optional[int] = None):
+        if limit:
+            # Bound the result server-side so only the sample crosses the wire
+            query = f"SELECT * FROM ({query.strip().rstrip(';')}) AS sample LIMIT {int(limit)}"
         try:
             result = self.client.rpc("sql", {"q": query}).execute()
             rows = result.data if result.data else []
-            columns = list(rows[0].keys()) if rows else []
+            columns = list(rows[0]) if rows else []
             return {
                 "success": True,
                 "rows": rows,
@@ -31,11 +41,20 @@ class SupabaseDB(BaseDB):
                 "error": str(e)
             }
 
+    def invalidate_schema_cache(self):
+        """Drop the cached schema, e.g. after new tables were uploaded"""
+        self._schema_cache = None
+        self._schema_ts = 0.0
+
     def get_schema(self):
         """
         Pulls schema info from Supabase information_schema
         Returns dict: {table_name: [column1, column2,...]}
+        (cached for SCHEMA_CACHE_TTL seconds)
         """
+        if self._schema_cache is not None and time.time() - self._schema_ts < self.SCHEMA_CACHE_TTL:
+            return self._schema_cache
+
         query = f"""
         SELECT table_name, column_name
         FROM information_schema.columns
@@ -47,4 +66,6 @@ class SupabaseDB(BaseDB):
             table = row["table_name"]
             col = row["column_name"]
             schema.setdefault(table, []).append(col)
+        self._schema_cache = schema
+        self._schema_ts = time.time()
         return schema
@@ -7,34 +7,98 @@ from agents.sql_executor import SQLExecutorAgent
 from agents.results_agents import ResultExplainerAgent
 from agents.analysis_decision_agent import AnalysisDecisionAgent
 from agents.csv_database_agent import CSVDatabaseAgent
-from llm.llm_client import GeminiClient
+from llm.llm_client import get_default_client
 from db import get_db
-from typing import Dict, Any, Union
-import json
+from typing import Dict, Any, List, Union
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
+from string import Template
+import logging
+import orjson
+import sqlglot
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())  # silent unless the application configures logging
+
+def _sql_fingerprint(sql: str) -> str:
+    """Canonical form of a query, so formatting/case differences compare equal"""
+    try:
+        return sqlglot.parse_one(sql or "", read="postgres").sql(dialect="postgres", normalize=True)
+    except sqlglot.errors.SqlglotError:
+        return " ".join((sql or "").split()).rstrip(";")
+
+# Final analysis response, filled in by _compile_final_response
+_RESPONSE_TEMPLATE = Template("""
+🧠 INTELLIGENT DATA ANALYSIS RESULTS
+
+📋 ANALYSIS STRATEGY:
+$strategy
+
+🎯 COGNITIVE ASSESSMENT:
+$assessment
+
+📊 DATA FINDINGS:
+$findings
+💡 INTELLIGENT INSIGHTS:
+$insights
+
+🚀 NEXT STEPS:
+$next_steps
+""")
+
+def _dumps(value: Any) -> str:
+    """Indented JSON for the response text (orjson, non-serialisable values fall back to str)"""
+    return orjson.dumps(value, default=str, option=orjson.OPT_INDENT_2).decode()
+
+@dataclass(slots=True)
+class GraphState:
+    """Workflow state; each node reads attributes and returns only the fields it sets"""
+    user_request: str = ""
+    upload_csvs: bool = False
+    csv_upload_results: List[Dict[str, Any]] = field(default_factory=list)
+    database_schema: Dict[str, Any] = field(default_factory=dict)
+    available_tables: List[str] = field(default_factory=list)
+    analysis_plan: Dict[str, Any] = field(default_factory=dict)
+    sql_queries: List[Dict[str, Any]] = field(default_factory=list)
+    execution_results: List[Dict[str, Any]] = field(default_factory=list)
+    analyzed_results: List[Dict[str, Any]] = field(default_factory=list)
+    intelligent_insights: Dict[str, Any] = field(default_factory=dict)
+    final_response: str = ""
 
 class IntelligentSQLAgentGraph:
+    # Planned SQL queries (and their LLM explanations) run concurrently per analysis
+    QUERY_WORKERS = 8
+    # Rows fetched per query unless the plan sets "sample_size"; explanations only sample them
+    SAMPLE_SIZE = 5000
+    
     def __init__(self, supabase_agent=None):
         # Initialize LLM
-        self.llm = GeminiClient()
+        self.llm = get_default_client()
         
-        # Use provided Supabase agent or create new one
+        # Use provided Supabase agent or the shared one
         if supabase_agent:
             self.supabase_agent = supabase_agent
         else:
-            from agents.supabase_agent import SupabaseAgent
-            self.supabase_agent = SupabaseAgent()
+            from agents.supabase_agent import get_default_agent
+            self.supabase_agent = get_default_agent()
         
         # Initialize all agents
         self.generator = SQLGeneratorAgent(self.llm)
         self.executor = SQLExecutorAgent()
-        self.explainer = ResultExplainerAgent()
+        self.explainer = ResultExplainerAgent(self.llm)
         self.analysis_agent = AnalysisDecisionAgent(self.llm)
-        self.csv_agent = CSVDatabaseAgent(llm=self.llm)
+        self.csv_agent = CSVDatabaseAgent(llm=self.llm, supabase_agent=self.supabase_agent)
         
         # No SQLite database connection - use Supabase instead
         
+        # Warm the agent's schema cache in the background so the first analysis finds it ready
+        preload = ThreadPoolExecutor(max_workers=1, thread_name_prefix="schema-preload")
+        preload.submit(self.supabase_agent.get_database_schema)
+        preload.shutdown(wait=False)  # the worker exits once the fetch is done
+        
         # Create LangGraph with state management
-        self.graph = StateGraph(dict)
+        self.graph = StateGraph(GraphState)
         self.setup_graph()
 
     def setup_graph(self):
@@ -62,53 +126,57 @@ class IntelligentSQLAgentGraph:
         # Compile the graph
         self.workflow = self.graph.compile()
 
-    def csv_integration_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def csv_integration_node(self, state: GraphState) -> Dict[str, Any]:
         """Node: Intelligent CSV integration"""
-        print("🔄 Step 1: CSV Integration & Database Preparation")
+        logger.info("🔄 Step 1: CSV Integration & Database Preparation")
+        
+        updates: Dict[str, Any] = {}
         
         # Check for CSV files and upload if requested
-        if state.get("upload_csvs", False):
+        if state.upload_csvs:
             csv_results = self.csv_agent.upload_all_csvs_in_directory(".")
-            state["csv_upload_results"] = csv_results
-            print(f"📊 Uploaded {len(csv_results)} CSV files to database")
+            updates["csv_upload_results"] = csv_results
+            logger.info("📊 Uploaded %d CSV files to database", len(csv_results))
+            if csv_results:
+                # New tables: the cached schema is stale
+                self.supabase_agent.invalidate_schema_cache()
         
-        # Get updated database schema using Supabase
+        # Get updated database schema using Supabase (served from the agent's cache unless invalidated)
         try:
             schema = self.supabase_agent.get_database_schema()
-            state["database_schema"] = schema
-            state["available_tables"] = list(schema.keys()) if schema else ["sales_data"]
+            updates["database_schema"] = schema
+            updates["available_tables"] = list(schema.keys()) if schema else ["sales_data"]
         except Exception as e:
             # Fallback to known table
-            print(f"⚠️ Schema detection failed: {e}")
-            state["database_schema"] = {"sales_data": []}
-            state["available_tables"] = ["sales_data"]
+            logger.warning("⚠️ Schema detection failed: %s", e)
+            updates["database_schema"] = {"sales_data": []}
+            updates["available_tables"] = ["sales_data"]
         
-        print(f"💾 Database contains tables: {state['available_tables']}")
-        return state
+        logger.info("💾 Database contains tables: %s", updates["available_tables"])
+        return updates
 
-    def analysis_planning_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def analysis_planning_node(self, state: GraphState) -> Dict[str, Any]:
         """Node: Intelligent analysis planning using LLM cognition"""
-        print("🧠 Step 2: Intelligent Analysis Planning")
+        logger.info("🧠 Step 2: Intelligent Analysis Planning")
         
-        user_request = state["user_request"]
-        schema = state["database_schema"]
+        user_request = state.user_request
+        schema = state.database_schema
         
         # Use LLM intelligence to plan analysis
         analysis_plan = self.analysis_agent.plan_analysis(user_request, schema)
-        state["analysis_plan"] = analysis_plan
         
-        print(f"🎯 Analysis Strategy: {analysis_plan.get('analysis_strategy', 'Intelligent analysis')}")
-        print(f"🔍 Complexity: {analysis_plan.get('estimated_complexity', 'medium')}")
+        logger.info("🎯 Analysis Strategy: %s", analysis_plan.get('analysis_strategy', 'Intelligent analysis'))
+        logger.info("🔍 Complexity: %s", analysis_plan.get('estimated_complexity', 'medium'))
         
-        return state
+        return {"analysis_plan": analysis_plan}
 
-    def sql_generation_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def sql_generation_node(self, state: GraphState) -> Dict[str, Any]:
         """Node: SQL generation based on intelligent analysis plan"""
-        print("⚡ Step 3: Intelligent SQL Generation")
+        logger.info("⚡ Step 3: Intelligent SQL Generation")
         
-        analysis_plan = state["analysis_plan"]
-        schema = state["database_schema"]
-        user_request = state["user_request"]
+        analysis_plan = state.analysis_plan
+        schema = state.database_schema
+        user_request = state.user_request
         
         # Generate SQL queries based on analysis plan
         sql_queries = []
@@ -137,144 +205,161 @@ class IntelligentSQLAgentGraph:
                 "analysis_type": "comprehensive"
             })
         
-        state["sql_queries"] = sql_queries
-        print(f"📝 Generated {len(sql_queries)} intelligent SQL queries")
+        logger.info("📝 Generated %d intelligent SQL queries", len(sql_queries))
         
-        return state
+        return {"sql_queries": sql_queries}
 
-    def sql_execution_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def sql_execution_node(self, state: GraphState) -> Dict[str, Any]:
         """Node: Execute SQL queries with intelligent error handling using Supabase"""
-        print("🔧 Step 4: Intelligent SQL Execution")
+        logger.info("🔧 Step 4: Intelligent SQL Execution")
+        
+        sql_queries = state.sql_queries
+        limit = state.analysis_plan.get("sample_size") or self.SAMPLE_SIZE
+        
+        # The planner can repeat a query (modulo formatting); run each distinct one once
+        keys = [_sql_fingerprint(q["sql"]) for q in sql_queries]
+        first_index = {}
+        for i, key in enumerate(keys):
+            first_index.setdefault(key, i)
+        unique = [sql_queries[i] for i in first_index.values()]
+        
+        # Queries in a plan are independent and latency-bound; run them side by side
+        if len(unique) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.QUERY_WORKERS, len(unique))) as executor:
+                unique_results = list(executor.map(
+                    self._execute_planned_query, unique, range(1, len(unique) + 1), repeat(limit)
+                ))
+        else:
+            unique_results = [self._execute_planned_query(q, 1, limit) for q in unique]
         
-        sql_queries = state["sql_queries"]
+        results_by_key = dict(zip(first_index, unique_results))
         execution_results = []
+        for i, (query_info, key) in enumerate(zip(sql_queries, keys)):
+            result = results_by_key[key]
+            if first_index[key] != i:
+                logger.info("   ♻️ Reusing result for duplicate query: %s", query_info['purpose'])
+                result = {
+                    **result,
+                    "purpose": query_info["purpose"],
+                    "analysis_type": query_info["analysis_type"],
+                    "original_sql": query_info["sql"],
+                }
+            execution_results.append(result)
         
-        for i, query_info in enumerate(sql_queries):
-            print(f"   Executing query {i+1}: {query_info['purpose']}")
+        return {"execution_results": execution_results}
+
+    def _execute_planned_query(self, query_info: Dict[str, Any], number: int, limit: int) -> Dict[str, Any]:
+        """Run one planned query through the Supabase agent and wrap the outcome"""
+        logger.info("   Executing query %d: %s", number, query_info['purpose'])
+        
+        # Use Supabase agent for execution instead of SQLite
+        try:
+            result = self.supabase_agent.execute_query(query_info["sql"], limit=limit)
             
-            # Use Supabase agent for execution instead of SQLite
-            try:
-                result = self.supabase_agent.execute_query(query_info["sql"])
-                
-                if result["success"]:
-                    # Convert to expected format
-                    execution_result = {
-                        "success": True,
-                        "rows": result["data"],
-                        "columns": list(result["data"][0].keys()) if result["data"] else [],
-                        "purpose": query_info["purpose"],
-                        "analysis_type": query_info["analysis_type"],
-                        "original_sql": query_info["sql"]
-                    }
-                    print(f"   ✅ Query success: {len(result['data'])} rows")
-                else:
-                    execution_result = {
-                        "success": False,
-                        "error": result["error"],
-                        "purpose": query_info["purpose"],
-                        "analysis_type": query_info["analysis_type"],
-                        "original_sql": query_info["sql"]
-                    }
-                    print(f"   ❌ Query failed: {result['error']}")
-                    
-            except Exception as e:
+            if result["success"]:
+                # Convert to expected format
+                execution_result = {
+                    "success": True,
+                    "rows": result["data"],
+                    "columns": result.get("columns") or [],
+                    "purpose": query_info["purpose"],
+                    "analysis_type": query_info["analysis_type"],
+                    "original_sql": query_info["sql"]
+                }
+                logger.info("   ✅ Query success: %d rows", len(result['data']))
+            else:
                 execution_result = {
                     "success": False,
-                    "error": str(e),
+                    "error": result["error"],
                     "purpose": query_info["purpose"],
                     "analysis_type": query_info["analysis_type"],
                     "original_sql": query_info["sql"]
                 }
-                print(f"   ❌ Query failed: {str(e)}")
-            
-            execution_results.append(execution_result)
-        
-        state["execution_results"] = execution_results
-        return state
+                logger.warning("   ❌ Query failed: %s", result['error'])
+                
+        except Exception as e:
+            execution_result = {
+                "success": False,
+                "error": str(e),
+                "purpose": query_info["purpose"],
+                "analysis_type": query_info["analysis_type"],
+                "original_sql": query_info["sql"]
+            }
+            logger.warning("   ❌ Query failed: %s", e)
+        
+        return execution_result
 
-    def result_analysis_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def result_analysis_node(self, state: GraphState) -> Dict[str, Any]:
         """Node: Analyze results using intelligent processing"""
-        print("📊 Step 5: Intelligent Result Analysis")
+        logger.info("📊 Step 5: Intelligent Result Analysis")
         
-        execution_results = state["execution_results"]
-        analyzed_results = []
+        successful = [result for result in state.execution_results if result["success"]]
         
-        for result in execution_results:
-            if result["success"]:
-                # Use explainer agent to analyze results
-                explanation = self.explainer.explain(
-                    result["original_sql"], 
-                    result["rows"], 
-                    result["columns"]
-                )
-                
-                analyzed_result = {
-                    "purpose": result["purpose"],
-                    "analysis_type": result["analysis_type"],
-                    "data": result["rows"],
-                    "columns": result["columns"],
-                    "explanation": explanation,
-                    "row_count": len(result["rows"])
-                }
-                
-                analyzed_results.append(analyzed_result)
-        
-        state["analyzed_results"] = analyzed_results
-        print(f"🎯 Analyzed {len(analyzed_results)} successful queries")
-        
-        return state
+        # Use explainer agent to analyze results; each explanation is an
+        # independent LLM call, so request them in parallel
+        if len(successful) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.QUERY_WORKERS, len(successful))) as executor:
+                explanations = list(executor.map(self._explain_result, successful))
+        else:
+            explanations = [self._explain_result(result) for result in successful]
+        
+        analyzed_results = [
+            {
+                "purpose": result["purpose"],
+                "analysis_type": result["analysis_type"],
+                "data": result["rows"],
+                "columns": result["columns"],
+                "explanation": explanation,
+                "row_count": len(result["rows"])
+            }
+            for result, explanation in zip(successful, explanations)
+        ]
+        
+        logger.info("🎯 Analyzed %d successful queries", len(analyzed_results))
+        
+        return {"analyzed_results": analyzed_results}
+
+    def _explain_result(self, result: Dict[str, Any]) -> str:
+        return self.explainer.explain(result["original_sql"], result["rows"], result["columns"])
 
-    def intelligent_insights_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def intelligent_insights_node(self, state: GraphState) -> Dict[str, Any]:
         """Node: Generate intelligent insights using LLM cognition"""
-        print("🧠 Step 6: Generating Intelligent Insights")
+        logger.info("🧠 Step 6: Generating Intelligent Insights")
         
-        user_request = state["user_request"]
-        analysis_plan = state["analysis_plan"]
-        analyzed_results = state["analyzed_results"]
+        user_request = state.user_request
+        analysis_plan = state.analysis_plan
+        analyzed_results = state.analyzed_results
         
         # Use LLM to generate intelligent insights
         insights = self.analysis_agent.decide_next_analysis_step(
             analyzed_results, user_request, analysis_plan
         )
         
-        state["intelligent_insights"] = insights
-        state["final_response"] = self._compile_final_response(state)
+        final_response = self._compile_final_response(analyzed_results, insights, analysis_plan)
         
-        print("✅ Intelligent analysis complete!")
-        return state
+        logger.info("✅ Intelligent analysis complete!")
+        return {"intelligent_insights": insights, "final_response": final_response}
 
-    def _compile_final_response(self, state: Dict[str, Any]) -> str:
+    def _compile_final_response(
+        self,
+        analyzed_results: List[Dict[str, Any]],
+        insights: Dict[str, Any],
+        analysis_plan: Dict[str, Any],
+    ) -> str:
         """Compile comprehensive intelligent response"""
         
-        analyzed_results = state.get("analyzed_results", [])
-        insights = state.get("intelligent_insights", {})
-        analysis_plan = state.get("analysis_plan", {})
-        
-        response = f"""
-🧠 INTELLIGENT DATA ANALYSIS RESULTS
-
-📋 ANALYSIS STRATEGY:
-{analysis_plan.get('analysis_strategy', 'Comprehensive intelligent analysis')}
-
-🎯 COGNITIVE ASSESSMENT:
-{insights.get('cognitive_assessment', 'Analysis completed successfully')}
-
-📊 DATA FINDINGS:
-"""
-        
+        findings = []
         for i, result in enumerate(analyzed_results, 1):
-            response += f"\n{i}. {result['purpose']} ({result['row_count']} rows)\n"
-            response += f"   {result['explanation'][:200]}...\n"
-        
-        response += f"""
-💡 INTELLIGENT INSIGHTS:
-{json.dumps(insights.get('insights_so_far', ['Advanced pattern analysis completed']), indent=2)}
-
-🚀 NEXT STEPS:
-{json.dumps(insights.get('remaining_questions', ['Analysis objectives achieved']), indent=2)}
-"""
-        
-        return response
+            findings.append(f"\n{i}. {result['purpose']} ({result['row_count']} rows)\n")
+            findings.append(f"   {result['explanation'][:200]}...\n")
+        
+        return _RESPONSE_TEMPLATE.substitute(
+            strategy=analysis_plan.get('analysis_strategy', 'Comprehensive intelligent analysis'),
+            assessment=insights.get('cognitive_assessment', 'Analysis completed successfully'),
+            findings="".join(findings),
+            insights=_dumps(insights.get('insights_so_far', ['Advanced pattern analysis completed'])),
+            next_steps=_dumps(insights.get('remaining_questions', ['Analysis objectives achieved'])),
+        )
 
     def run_intelligent_analysis(
         self,
@@ -303,6 +388,8 @@ class IntelligentSQLAgentGraph:
         return self.run_intelligent_analysis(question, upload_csvs=True)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Test the Intelligent SQL Agent
     try:
         agent = IntelligentSQLAgentGraph()
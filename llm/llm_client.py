@@ -1,17 +1,43 @@
 # Gemini wrapper
 # llm/llm_client.py
 
-import requests
+import httpx
 import os
+import threading
+from functools import lru_cache
 from config import LLM_MODEL, LLM_TEMPERATURE, GEMINI_API_KEY
 
 class GeminiClient:
+    # One keep-alive HTTP/2 pool shared by every client instance in the process
+    HTTP_POOL_LIMITS = httpx.Limits(max_keepalive_connections=8, max_connections=16)
+    HTTP_TIMEOUT = httpx.Timeout(60.0, connect=3.05)
+    _http_client = None
+    _http_lock = threading.Lock()
+
     def __init__(self, api_key: str = None, model: str = "gemini-2.0-flash", temperature: float = LLM_TEMPERATURE):
         self.api_key = api_key or GEMINI_API_KEY or os.environ.get("GEMINI_API_KEY")
         self.model = model
         self.temperature = temperature
         self.endpoint = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent?key={self.api_key}"
 
+    @classmethod
+    def http_client(cls) -> httpx.Client:
+        if cls._http_client is None:
+            with cls._http_lock:
+                if cls._http_client is None:
+                    cls._http_client = httpx.Client(
+                        http2=True, timeout=cls.HTTP_TIMEOUT, limits=cls.HTTP_POOL_LIMITS
+                    )
+        return cls._http_client
+
+    @classmethod
+    def close(cls) -> None:
+        """Close the shared connection pool (a new one is opened on next use)"""
+        with cls._http_lock:
+            client, cls._http_client = cls._http_client, None
+        if client is not None:
+            client.close()
+
     def generate(self, prompt: str) -> str:
         """
         Sends prompt to Gemini API and returns the text response
@@ -33,10 +59,16 @@ class GeminiClient:
             }
         }
 
-        response = requests.post(self.endpoint, headers=headers, json=payload)
+        response = self.http_client().post(self.endpoint, headers=headers, json=payload)
 
         if response.status_code != 200:
             raise Exception(f"Gemini API error: {response.status_code}, {response.text}")
 
         data = response.json()
         return data["candidates"][0]["content"]["parts"][0]["text"]
+
+
+@lru_cache(maxsize=None)
+def get_default_client() -> GeminiClient:
+    """Process-wide GeminiClient for callers that don't need their own settings"""
+    return GeminiClient()
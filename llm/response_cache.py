@@ -0,0 +1,107 @@
+# Chat response cache (exact + optional semantic tier)
+# llm/response_cache.py
+
+import hashlib
+import logging
+import re
+import threading
+from typing import Any, Optional
+
+import numpy as np
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r"\s+")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+class ResponseCache:
+    """
+    Caches answers to repeated questions so hits skip the LLM pipeline.
+    Entries are keyed by the normalized prompt plus its conversation context, so a
+    follow-up like "and by city?" only hits within the same preceding turns. When
+    sentence-transformers is installed, near-duplicates above `threshold` cosine
+    similarity (with the same context) also hit.
+
+    get/set may load the encoder and run it; call them off the event loop.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: int = 3600, threshold: float = 0.9,
+                 model_name: str = "all-MiniLM-L6-v2"):
+        self.threshold = threshold
+        self.model_name = model_name
+        self._exact = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._embeddings = TTLCache(maxsize=maxsize, ttl=ttl)  # key -> (context key, vector)
+        self._encoder = None
+        self._encoder_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(message: str) -> str:
+        return _WS_RE.sub(" ", _PUNCT_RE.sub(" ", message.lower())).strip()
+
+    @staticmethod
+    def _key(normalized: str, context: str = "") -> str:
+        return hashlib.sha1(f"{context}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _context_key(cls, context: str) -> str:
+        return cls._key(cls.normalize(context)) if context else ""
+
+    def load_encoder(self) -> bool:
+        """Load the sentence encoder once (slow); True when the semantic tier is available"""
+        if self._encoder is None:
+            with self._encoder_lock:
+                if self._encoder is None:
+                    try:
+                        from sentence_transformers import SentenceTransformer
+                        self._encoder = SentenceTransformer(self.model_name)
+                    except Exception as exc:
+                        logger.info("Semantic response cache disabled: %s", exc)
+                        self._encoder = False
+        return bool(self._encoder)
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Unit-length embedding, or None when no encoder is available"""
+        if not self.load_encoder():
+            return None
+        return self._encoder.encode(text, normalize_embeddings=True)
+
+    def get(self, message: str, context: str = "") -> Optional[Any]:
+        normalized = self.normalize(message)
+        context_key = self._context_key(context)
+        key = self._key(normalized, context_key)
+        with self._lock:
+            value = self._exact.get(key)
+            if value is not None:
+                return value
+            candidates = [(k, vector) for k, (ctx, vector) in self._embeddings.items() if ctx == context_key]
+        if not candidates:
+            return None
+
+        query = self._embed(normalized)
+        if query is None:
+            return None
+        keys, vectors = zip(*candidates)
+        scores = np.vstack(vectors) @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        with self._lock:
+            return self._exact.get(keys[best])
+
+    def set(self, message: str, value: Any, context: str = "") -> None:
+        normalized = self.normalize(message)
+        context_key = self._context_key(context)
+        key = self._key(normalized, context_key)
+        embedding = self._embed(normalized)
+        with self._lock:
+            self._exact[key] = value
+            if embedding is not None:
+                self._embeddings[key] = (context_key, embedding)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._exact.clear()
+            self._embeddings.clear()
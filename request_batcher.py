@@ -0,0 +1,67 @@
+# Coalesces concurrent pipeline requests into short batches
+# request_batcher.py
+
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+class RequestBatcher:
+    """
+    Collects calls arriving within `window` seconds (up to `max_batch`) and runs
+    them together on worker threads. Identical keys in flight share one run, so
+    a burst of the same question triggers a single pipeline execution.
+    """
+
+    def __init__(self, handler: Callable[..., Any], window: float = 0.05, max_batch: int = 8):
+        self.handler = handler
+        self.window = window
+        self.max_batch = max_batch
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[Tuple[Any, ...], asyncio.Future]] = []
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._runs: Set[asyncio.Task] = set()
+
+    async def submit(self, key: str, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # State is bound to the loop that created it (e.g. a fresh loop per test client)
+            self._loop, self._pending, self._inflight, self._flush_handle = loop, [], {}, None
+            self._runs = set()
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = loop.create_future()
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self._pending.append((args, future))
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._flush)
+
+        # shield: one cancelled caller must not cancel the run other callers share
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._runs.add(task)  # keep a reference until the batch finishes
+            task.add_done_callback(self._runs.discard)
+
+    async def _run(self, batch: List[Tuple[Tuple[Any, ...], asyncio.Future]]) -> None:
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self.handler, *args) for args, _ in batch),
+            return_exceptions=True,
+        )
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -5,8 +5,28 @@ Startup script to run both FastAPI backend and Next.js frontend
 import subprocess
 import sys
 import os
+import threading
 import time
 
+def wait_for_first_exit(processes):
+    """Block until one of the (name, proc) pairs exits and return it"""
+    if hasattr(os, "waitid"):
+        # POSIX: sleep in the kernel until any child exits; WNOWAIT leaves it for poll() to reap
+        while True:
+            os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOWAIT)
+            for name, proc in processes:
+                if proc.poll() is not None:
+                    return name, proc
+
+    # Windows: one wait thread per process signals a shared event
+    exited = threading.Event()
+    for name, proc in processes:
+        threading.Thread(target=lambda p=proc: (p.wait(), exited.set()), daemon=True).start()
+    # The timeout only keeps Ctrl+C responsive; an exit wakes the wait immediately
+    while not exited.wait(1.0):
+        pass
+    return next((name, proc) for name, proc in processes if proc.poll() is not None)
+
 def main():
     print("=" * 80)
     print("🚀 AI Data Analysis Platform - Full Stack Startup")
@@ -27,11 +47,7 @@ def main():
         # Start FastAPI backend
         print("\n📊 Starting FastAPI Backend (port 8000)...")
         backend = subprocess.Popen(
-            [sys.executable, "api_server.py"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            bufsize=1
+            [sys.executable, "api_server.py"]  # output goes straight to this terminal
         )
         processes.append(("Backend", backend))
         
@@ -45,10 +61,6 @@ def main():
         frontend = subprocess.Popen(
             ["npm", "run", "dev"],
             cwd="ai-data-dashboard",
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            bufsize=1,
             shell=True
         )
         processes.append(("Frontend", frontend))
@@ -64,14 +76,9 @@ def main():
         print("=" * 80)
         
         # Monitor processes
-        while True:
-            for name, proc in processes:
-                # Check if process is still running
-                if proc.poll() is not None:
-                    print(f"\n❌ {name} process exited unexpectedly")
-                    raise KeyboardInterrupt
-            
-            time.sleep(1)
+        name, _ = wait_for_first_exit(processes)
+        print(f"\n❌ {name} process exited unexpectedly")
+        raise KeyboardInterrupt
             
     except KeyboardInterrupt:
         print("\n\n🛑 Shutting down services...")
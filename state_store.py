@@ -0,0 +1,109 @@
+# Shared API state: chat history, report task status, report file paths
+# state_store.py
+
+import json
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, List, Optional
+
+from cachetools import TTLCache
+
+CONVERSATION_TTL = 3600        # seconds a conversation survives without new messages
+TASK_TTL = 24 * 3600           # seconds a report task / report path is remembered
+MAX_MESSAGES = 50              # messages kept per conversation
+
+
+class InMemoryStateStore:
+    """Process-local store (single worker); entries expire like the Redis store"""
+
+    def __init__(self, maxsize: int = 10_000):
+        self._conversations: TTLCache = TTLCache(maxsize=maxsize, ttl=CONVERSATION_TTL)
+        self._tasks: TTLCache = TTLCache(maxsize=maxsize, ttl=TASK_TTL)
+        self._reports: TTLCache = TTLCache(maxsize=maxsize, ttl=TASK_TTL)
+
+    async def append_message(self, conversation_id: str, message: Dict[str, Any]) -> None:
+        history = self._conversations.get(conversation_id)
+        if history is None:
+            history = deque(maxlen=MAX_MESSAGES)  # O(1) append with automatic eviction
+        history.append(message)
+        self._conversations[conversation_id] = history  # re-set to refresh the TTL
+
+    async def recent_messages(self, conversation_id: str, count: int = 5) -> List[Dict[str, Any]]:
+        history = self._conversations.get(conversation_id, ())
+        return list(islice(history, max(0, len(history) - count), None))
+
+    async def set_task(self, task_id: str, status: Dict[str, Any]) -> None:
+        self._tasks[task_id] = dict(status)
+
+    async def update_task(self, task_id: str, fields: Dict[str, Any]) -> None:
+        task = self._tasks.get(task_id)
+        if task is not None:
+            task.update(fields)
+
+    async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return self._tasks.get(task_id)
+
+    async def set_report_path(self, filename: str, path: str) -> None:
+        self._reports[filename] = path
+
+    async def get_report_path(self, filename: str) -> Optional[str]:
+        return self._reports.get(filename)
+
+    async def forget_report_path(self, filename: str) -> None:
+        self._reports.pop(filename, None)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisStateStore:
+    """Redis-backed store so several workers/replicas share history and task status"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url, decode_responses=True)
+
+    async def append_message(self, conversation_id: str, message: Dict[str, Any]) -> None:
+        key = f"conv:{conversation_id}"
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.rpush(key, json.dumps(message))
+            pipe.ltrim(key, -MAX_MESSAGES, -1)
+            pipe.expire(key, CONVERSATION_TTL)
+            await pipe.execute()
+
+    async def recent_messages(self, conversation_id: str, count: int = 5) -> List[Dict[str, Any]]:
+        raw = await self.redis.lrange(f"conv:{conversation_id}", -count, -1)
+        return [json.loads(item) for item in raw]
+
+    async def set_task(self, task_id: str, status: Dict[str, Any]) -> None:
+        await self.redis.set(f"task:{task_id}", json.dumps(status), ex=TASK_TTL)
+
+    async def update_task(self, task_id: str, fields: Dict[str, Any]) -> None:
+        task = await self.get_task(task_id)
+        if task is not None:
+            task.update(fields)
+            await self.set_task(task_id, task)
+
+    async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis.get(f"task:{task_id}")
+        return json.loads(raw) if raw else None
+
+    async def set_report_path(self, filename: str, path: str) -> None:
+        await self.redis.set(f"report:{filename}", path, ex=TASK_TTL)
+
+    async def get_report_path(self, filename: str) -> Optional[str]:
+        return await self.redis.get(f"report:{filename}")
+
+    async def forget_report_path(self, filename: str) -> None:
+        await self.redis.delete(f"report:{filename}")
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def create_state_store(redis_url: str = ""):
+    """Redis store when REDIS_URL is configured, otherwise the in-memory store"""
+    if redis_url:
+        return RedisStateStore(redis_url)
+    return InMemoryStateStore()
@@ -6,13 +6,16 @@ Modern, clean interface for Supabase integration
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from agents.supabase_agent import SupabaseAgent
+from agents.supabase_agent import get_default_agent
 from graph import IntelligentSQLAgentGraph
 from data_driven_report import DataDrivenReportGenerator
+import io
 import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import config
 
 # Page configuration
 st.set_page_config(
@@ -22,8 +25,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
+# Custom CSS, built once per process (the script itself re-executes on every rerun)
+@st.cache_resource
+def app_css() -> str:
+    return """
 <style>
     .main-header {
         text-align: center;
@@ -33,12 +38,6 @@ st.markdown("""
         border-radius: 10px;
         margin-bottom: 2rem;
     }
-    .metric-card {
-        background: #f8f9fa;
-        padding: 1rem;
-        border-radius: 8px;
-        border: 1px solid #e9ecef;
-    }
     .success-box {
         background: #d4edda;
         color: #155724;
@@ -56,37 +55,150 @@ st.markdown("""
         margin: 1rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(app_css(), unsafe_allow_html=True)
+
+# Agents are process-wide resources shared by every session
+@st.cache_resource
+def get_supabase_agent():
+    return get_default_agent()
+
+@st.cache_resource
+def get_sql_agent(_supabase_agent):
+    # Pass the Supabase agent to avoid threading issues
+    return IntelligentSQLAgentGraph(supabase_agent=_supabase_agent)
+
+@st.cache_resource
+def get_pdf_generator(_supabase_agent):
+    # Pass the Supabase agent for data access
+    return DataDrivenReportGenerator(supabase_agent=_supabase_agent)
+
+try:
+    supabase_agent = get_supabase_agent()
+except Exception as e:
+    supabase_agent = None
+    st.error(f"❌ Failed to connect to Supabase: {e}")
+try:
+    sql_agent = get_sql_agent(supabase_agent)
+except Exception as e:
+    sql_agent = None
+try:
+    pdf_generator = get_pdf_generator(supabase_agent)
+except Exception as e:
+    pdf_generator = None
 
 # Initialize session state
-if 'supabase_agent' not in st.session_state:
-    try:
-        st.session_state.supabase_agent = SupabaseAgent()
-    except Exception as e:
-        st.session_state.supabase_agent = None
-        st.error(f"❌ Failed to connect to Supabase: {e}")
 if 'uploaded_tables' not in st.session_state:
-    st.session_state.uploaded_tables = []
-if 'sql_agent' not in st.session_state:
+    # Column-wise, so the dashboard builds its DataFrame without walking row dicts
+    st.session_state.uploaded_tables = {"table_name": [], "rows": [], "columns": [], "uploaded_at": []}
+
+# Catalog lookups are memoised across reruns and sessions; "Refresh" or an upload clears them.
+# The leading underscore keeps Streamlit from hashing the agent.
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_list_tables(_agent):
+    return _agent.list_tables()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_schema(_agent):
+    return _agent.get_database_schema()
+
+def clear_catalog_cache():
+    """Forget memoised table lists and schemas (after the database changed)"""
+    _cached_list_tables.clear()
+    _cached_schema.clear()
+
+# Memory-backed scratch space for upload hand-offs where available (Linux)
+UPLOAD_TMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+def upload_tmp_dir(file_size: int):
+    """UPLOAD_TMP_DIR when it has room for the file, else None (the default temp dir)"""
+    if UPLOAD_TMP_DIR is None:
+        return None
     try:
-        # Pass the Supabase agent to avoid threading issues
-        supabase_agent = st.session_state.get('supabase_agent')
-        st.session_state.sql_agent = IntelligentSQLAgentGraph(supabase_agent=supabase_agent)
-    except Exception as e:
-        st.session_state.sql_agent = None
-if 'pdf_generator' not in st.session_state:
+        if shutil.disk_usage(UPLOAD_TMP_DIR).free > file_size:
+            return UPLOAD_TMP_DIR
+    except OSError:
+        pass
+    return None
+
+def upload_chunk_size(file_size: int) -> int:
+    """Copy buffer for an upload: UPLOAD_CHUNK_SIZE if set, else 256 KB under 10 MB and 4 MB above"""
+    if config.UPLOAD_CHUNK_SIZE > 0:
+        return config.UPLOAD_CHUNK_SIZE
+    return 256 * 1024 if file_size < 10 * 1024 * 1024 else 4 * 1024 * 1024
+
+PREVIEW_BYTES = 64 * 1024
+
+def read_csv_preview(uploaded_file, nrows: int = 5) -> pd.DataFrame:
+    """First rows of an uploaded CSV, parsed from a bounded head of the file"""
+    head = uploaded_file.read(PREVIEW_BYTES)
+    uploaded_file.seek(0)
+    if len(head) == PREVIEW_BYTES:
+        # Drop the partial last line; if there is no full line in the head, parse the whole file
+        cut = head.rfind(b"\n")
+        if cut < 0:
+            return pd.read_csv(uploaded_file, nrows=nrows)
+        head = head[:cut + 1]
     try:
-        # Pass the Supabase agent for data access
-        supabase_agent = st.session_state.get('supabase_agent')
-        st.session_state.pdf_generator = DataDrivenReportGenerator(supabase_agent=supabase_agent)
-    except Exception as e:
-        st.session_state.pdf_generator = None
+        # Arrow's C++ reader parses the head without pandas' per-column Python inference
+        import pyarrow.csv as pv
+        return pv.read_csv(io.BytesIO(head)).slice(0, nrows).to_pandas(split_blocks=True, self_destruct=True)
+    except Exception:
+        # No pyarrow, or a head it rejects (e.g. ragged rows): parse it with pandas
+        return pd.read_csv(io.StringIO(head.decode("utf-8", errors="replace")), nrows=nrows)
+
+# Result frames show at most this many rows/columns unless the user asks for all of them
+RENDER_MAX_ROWS = 200
+RENDER_MAX_COLS = 50
+# Custom-query results up to this many rows render as a plain st.table
+SMALL_RESULT_ROWS = 20
+
+def show_result_frame(df: pd.DataFrame, key: str):
+    """Render a query result, projecting large frames down to what fits on screen"""
+    if len(df) <= RENDER_MAX_ROWS and len(df.columns) <= RENDER_MAX_COLS:
+        st.dataframe(df, use_container_width=True)
+        return
+    if st.toggle("Show all rows and columns", key=key):
+        st.dataframe(df, use_container_width=True, height=400)
+    else:
+        st.dataframe(df.iloc[:RENDER_MAX_ROWS, :RENDER_MAX_COLS], use_container_width=True, height=400)
+        st.caption(
+            f"Showing {min(len(df), RENDER_MAX_ROWS)} of {len(df):,} rows and "
+            f"{min(len(df.columns), RENDER_MAX_COLS)} of {len(df.columns)} columns"
+        )
+
+def fetch_table_overview(table: str, sample_size: int):
+    """(stats, sample) for a table, with both Supabase round-trips in flight at once.
+    
+    The sample also carries "by_column", its rows transposed once into per-column lists.
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        stats = pool.submit(supabase_agent.get_table_stats, table)
+        sample = pool.submit(supabase_agent.get_table_sample, table, sample_size)
+        stats, sample = stats.result(), sample.result()
+    rows = sample.get("data") or []
+    sample["by_column"] = {col: [row.get(col) for row in rows] for col in sample.get("columns") or []}
+    return stats, sample
+
+@st.cache_data(show_spinner=False)
+def sample_scatter(table: str, by_column: dict):
+    """Scatter of a sample's first two numeric columns as a figure dict (None if there aren't two)"""
+    import plotly.express as px  # only the analysis page charts; keep it off the startup path
+    
+    df = pd.DataFrame(by_column, copy=False)
+    
+    # Simple chart based on data types
+    numeric_cols = df.select_dtypes(include=['number']).columns
+    if len(numeric_cols) < 2:
+        return None
+    return px.scatter(df, x=numeric_cols[0], y=numeric_cols[1]).to_dict()
 
 def initialize_agents():
     """Initialize all agents"""
     try:
-        # All agents are now initialized in session state above
-        return st.session_state.supabase_agent is not None
+        # All agents are now initialized as shared resources above
+        return supabase_agent is not None
     except Exception as e:
         st.error(f"❌ Initialization failed: {e}")
         return False
@@ -115,22 +227,8 @@ def main():
         )
         
         # Database status
-        if st.session_state.supabase_agent:
-            st.markdown("### 📊 Database Status")
-            try:
-                tables = st.session_state.supabase_agent.list_tables()
-                st.success(f"✅ Connected to Supabase")
-                st.info(f"📋 Tables: {len(tables)}")
-                
-                if tables:
-                    st.markdown("**Available Tables:**")
-                    for table in tables[:5]:  # Show first 5 tables
-                        st.text(f"• {table}")
-                    if len(tables) > 5:
-                        st.text(f"... and {len(tables) - 5} more")
-                        
-            except Exception as e:
-                st.error(f"❌ Database connection error")
+        if supabase_agent:
+            sidebar_db_status()
     
     # Main content based on page selection
     if page == "📊 Dashboard":
@@ -144,31 +242,37 @@ def main():
     elif page == "🔧 Database Explorer":
         show_database_explorer()
 
+@st.fragment(run_every="30s")
+def sidebar_db_status():
+    """Sidebar database status; reruns on its own timer/button instead of with the whole page"""
+    st.markdown("### 📊 Database Status")
+    try:
+        tables = _cached_list_tables(supabase_agent)
+        st.success(f"✅ Connected to Supabase")
+        st.info(f"📋 Tables: {len(tables)}")
+        
+        if tables:
+            # Show first 5 tables, all in one element
+            more = f"\n\n_... and {len(tables) - 5} more_" if len(tables) > 5 else ""
+            st.markdown("**Available Tables:**\n\n" + "\n".join(f"- {table}" for table in tables[:5]) + more)
+                
+    except Exception as e:
+        st.error(f"❌ Database connection error")
+    
+    if st.button("🔄 Refresh", use_container_width=True):
+        clear_catalog_cache()
+        st.rerun()  # whole app, so pages pick up the new table list too
+
 def show_dashboard():
     """Main dashboard page"""
     st.header("📊 Platform Dashboard")
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("🗄️ Tables", len(st.session_state.supabase_agent.list_tables()) if st.session_state.supabase_agent else 0)
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("📈 Uploads", len(st.session_state.uploaded_tables))
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("🤖 AI Status", "Ready" if st.session_state.supabase_agent else "Offline")
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("📊 Platform", "Supabase")
-        st.markdown('</div>', unsafe_allow_html=True)
+    # Bordered containers draw the cards; one element per card instead of markdown open/close tags
+    col1, col2, col3, col4 = (col.container(border=True) for col in st.columns(4))
+    col1.metric("🗄️ Tables", len(_cached_list_tables(supabase_agent)) if supabase_agent else 0)
+    col2.metric("📈 Uploads", len(st.session_state.uploaded_tables["table_name"]))
+    col3.metric("🤖 AI Status", "Ready" if supabase_agent else "Offline")
+    col4.metric("📊 Platform", "Supabase")
     
     # Quick actions
     st.header("🚀 Quick Actions")
@@ -190,9 +294,9 @@ def show_dashboard():
             st.rerun()
     
     # Recent activity
-    if st.session_state.uploaded_tables:
+    if st.session_state.uploaded_tables["table_name"]:
         st.header("📈 Recent Uploads")
-        df = pd.DataFrame(st.session_state.uploaded_tables)
+        df = pd.DataFrame(st.session_state.uploaded_tables, copy=False)
         st.dataframe(df, use_container_width=True)
 
 def show_upload_page():
@@ -212,7 +316,7 @@ def show_upload_page():
         
         # Preview data
         try:
-            preview_df = pd.read_csv(uploaded_file, nrows=5)
+            preview_df = read_csv_preview(uploaded_file)
             st.subheader("👁️ Data Preview")
             st.dataframe(preview_df, use_container_width=True)
             
@@ -237,18 +341,25 @@ def show_upload_page():
             # Upload process
             if upload_button and table_name:
                 with st.spinner(f"📤 Uploading {uploaded_file.name} to Supabase..."):
-                    # Save uploaded file temporarily
-                    temp_path = f"temp_{uploaded_file.name}"
-                    with open(temp_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
+                    # Save uploaded file temporarily, streaming it in chunks (the preview moved the cursor)
+                    uploaded_file.seek(0)
+                    with tempfile.NamedTemporaryFile(dir=upload_tmp_dir(uploaded_file.size), delete=False, suffix=".csv") as f:
+                        shutil.copyfileobj(uploaded_file, f, length=upload_chunk_size(uploaded_file.size))
+                        temp_path = f.name
                     
-                    # Upload to Supabase
-                    result = st.session_state.supabase_agent.upload_csv_to_supabase(temp_path, table_name)
+                    # The bytes now live in the temp file; release this run's copies before the long upload
+                    del preview_df
+                    uploaded_file.close()
                     
-                    # Clean up temp file
-                    os.remove(temp_path)
+                    try:
+                        # Upload to Supabase
+                        result = supabase_agent.upload_csv_to_supabase(temp_path, table_name)
+                    finally:
+                        # Clean up temp file
+                        os.remove(temp_path)
                     
                     if result["success"]:
+                        clear_catalog_cache()  # a new table exists now
                         st.markdown(f"""
                         <div class="success-box">
                             <h4>✅ Upload Successful!</h4>
@@ -259,12 +370,14 @@ def show_upload_page():
                         """, unsafe_allow_html=True)
                         
                         # Add to session state
-                        st.session_state.uploaded_tables.append({
+                        upload = {
                             "table_name": result['table_name'],
                             "rows": result['rows_uploaded'],
                             "columns": len(result['columns']),
                             "uploaded_at": datetime.now().strftime("%Y-%m-%d %H:%M")
-                        })
+                        }
+                        for key, value in upload.items():
+                            st.session_state.uploaded_tables[key].append(value)
                         
                         st.balloons()
                     else:
@@ -283,7 +396,7 @@ def show_analysis_page():
     st.header("🧠 AI-Powered Data Analysis")
     
     # Select table
-    tables = st.session_state.supabase_agent.list_tables()
+    tables = _cached_list_tables(supabase_agent)
     
     if not tables:
         st.warning("📭 No tables found. Please upload data first.")
@@ -293,15 +406,14 @@ def show_analysis_page():
     
     if selected_table:
         # Show table info
+        stats, sample = fetch_table_overview(selected_table, 3)
         col1, col2 = st.columns(2)
         
         with col1:
-            stats = st.session_state.supabase_agent.get_table_stats(selected_table)
             if "row_count" in stats:
                 st.metric("📊 Total Rows", f"{stats['row_count']:,}")
         
         with col2:
-            sample = st.session_state.supabase_agent.get_table_sample(selected_table, 3)
             if sample["success"]:
                 st.metric("📋 Columns", len(sample["columns"]))
         
@@ -314,13 +426,13 @@ def show_analysis_page():
         
         if st.button("🚀 Run AI Analysis", type="primary"):
             if analysis_request:
-                if st.session_state.sql_agent is None:
+                if sql_agent is None:
                     st.error("❌ SQL agent not available. Please refresh the page.")
                     return
                     
                 with st.spinner("🧠 AI is analyzing your data..."):
                     try:
-                        result = st.session_state.sql_agent.run_intelligent_analysis(
+                        result = sql_agent.run_intelligent_analysis(
                             f"Analyze {selected_table}: {analysis_request}"
                         )
                         
@@ -333,12 +445,8 @@ def show_analysis_page():
                     # Show sample visualization
                     if sample["success"] and sample["data"]:
                         st.subheader("📊 Data Visualization")
-                        df = pd.DataFrame(sample["data"])
-                        
-                        # Simple chart based on data types
-                        numeric_cols = df.select_dtypes(include=['number']).columns
-                        if len(numeric_cols) >= 2:
-                            fig = px.scatter(df, x=numeric_cols[0], y=numeric_cols[1])
+                        fig = sample_scatter(selected_table, sample["by_column"])
+                        if fig is not None:
                             st.plotly_chart(fig, use_container_width=True)
             else:
                 st.warning("Please enter an analysis request")
@@ -347,7 +455,7 @@ def show_reports_page():
     """Reports generation page"""
     st.header("📄 Generate Analysis Reports")
     
-    tables = st.session_state.supabase_agent.list_tables()
+    tables = _cached_list_tables(supabase_agent)
     
     if not tables:
         st.warning("📭 No tables found. Please upload data first.")
@@ -374,13 +482,13 @@ def show_reports_page():
     
     if st.button("🎯 Generate CEO-Grade Executive Report", type="primary"):
         if report_request and selected_tables:
-            if st.session_state.pdf_generator is None:
+            if pdf_generator is None:
                 st.error("❌ PDF generator not available. Please refresh the page.")
                 return
                 
             with st.spinner("🎯 Generating CEO-grade executive report... LLM is autonomously planning structure and content..."):
                 try:
-                    report_file = st.session_state.pdf_generator.create_pdf_report(
+                    report_file = pdf_generator.create_pdf_report(
                         report_request
                     )
                     
@@ -405,7 +513,7 @@ def show_database_explorer():
     """Database explorer page"""
     st.header("🔧 Database Explorer")
     
-    tables = st.session_state.supabase_agent.list_tables()
+    tables = _cached_list_tables(supabase_agent)
     
     if not tables:
         st.info("📭 No tables found in your Supabase database")
@@ -418,30 +526,29 @@ def show_database_explorer():
         # Table information
         st.subheader(f"📊 Table: {selected_table}")
         
+        stats, sample = fetch_table_overview(selected_table, 10)
         col1, col2 = st.columns(2)
         
         with col1:
             # Table stats
-            stats = st.session_state.supabase_agent.get_table_stats(selected_table)
             if "row_count" in stats:
                 st.metric("📈 Rows", f"{stats['row_count']:,}")
                 st.metric("🔍 Unique Rows", f"{stats.get('unique_rows', 'N/A'):,}")
         
         with col2:
             # Schema info
-            schema = st.session_state.supabase_agent.get_database_schema()
+            schema = _cached_schema(supabase_agent)
             if selected_table in schema:
                 st.write("**Columns:**")
-                for col in schema[selected_table]:
-                    st.text(f"• {col['name']} ({col['type']})")
+                # One markdown block instead of a text element per column
+                st.markdown("\n".join(f"- `{col['name']}` ({col['type']})" for col in schema[selected_table]))
         
         # Sample data
         st.subheader("👁️ Sample Data")
-        sample = st.session_state.supabase_agent.get_table_sample(selected_table, 10)
         
         if sample["success"]:
-            df = pd.DataFrame(sample["data"])
-            st.dataframe(df, use_container_width=True)
+            df = pd.DataFrame(sample["by_column"], copy=False)
+            show_result_frame(df, key="explorer_sample_all")
         
         # Custom query
         st.subheader("⚡ Custom SQL Query")
@@ -451,18 +558,26 @@ def show_database_explorer():
             help="Write your custom SQL query"
         )
         
-        if st.button("🚀 Execute Query"):
-            if custom_query:
-                result = st.session_state.supabase_agent.execute_query(custom_query)
-                
-                if result["success"]:
-                    if "data" in result:
-                        st.dataframe(pd.DataFrame(result["data"]), use_container_width=True)
-                        st.info(f"📊 {result.get('row_count', 0)} rows returned")
+        if st.button("🚀 Execute Query") and custom_query:
+            # Keep the result across reruns (e.g. the "show all" toggle) while the query is unchanged
+            st.session_state.explorer_query = (custom_query, supabase_agent.execute_query(custom_query))
+        
+        last_query = st.session_state.get("explorer_query")
+        if last_query and last_query[0] == custom_query:
+            result = last_query[1]
+            
+            if result["success"]:
+                if "data" in result:
+                    if len(result["data"]) <= SMALL_RESULT_ROWS:
+                        # Quick previews: a static table, no DataFrame or interactive grid
+                        st.table(result["data"])
                     else:
-                        st.success(result.get("message", "Query executed successfully"))
+                        show_result_frame(pd.DataFrame(result["data"]), key="explorer_query_all")
+                    st.info(f"📊 {result.get('row_count', 0)} rows returned")
                 else:
-                    st.error(f"❌ Query failed: {result['error']}")
+                    st.success(result.get("message", "Query executed successfully"))
+            else:
+                st.error(f"❌ Query failed: {result['error']}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
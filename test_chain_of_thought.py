@@ -30,9 +30,11 @@ try:
     print(f"Report: {report_path}")
     print("="*80)
     
-    # Open the PDF
+    # Open the PDF only when asked (OPEN_PDF=1), with the platform's default viewer
     import os
-    os.startfile(report_path)
+    if os.environ.get("OPEN_PDF") == "1":
+        import webbrowser
+        webbrowser.open(f"file://{os.path.abspath(report_path)}")
     
 except Exception as e:
     print(f"\n❌ ERROR: {e}")
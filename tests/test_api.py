@@ -30,7 +30,12 @@ class FakeSupabaseAgent:
     def get_table_stats(self, table: str) -> Dict[str, int]:
         return {"row_count": 25}
 
+    def get_bulk_table_stats(self, tables: List[str]) -> Dict[str, int]:
+        return {table: 25 for table in tables}
+
     def execute_query(self, sql: str) -> Dict[str, Any]:
+        if "COUNT(DISTINCT" in sql:
+            return {"success": True, "data": [{"n": 2}], "columns": ["n"], "row_count": 1}
         return {
             "success": True,
             "data": [
@@ -83,13 +88,20 @@ class FakeLangGraph:
         return state if return_state else state["final_response"]
 
 
+@pytest.fixture(scope="module")
+def _shared_app() -> Tuple[TestClient, FakeSupabaseAgent, FakeLangGraph]:
+    return TestClient(api_server.app), FakeSupabaseAgent(), FakeLangGraph()
+
+
 @pytest.fixture
-def test_app(monkeypatch) -> Tuple[TestClient, FakeSupabaseAgent, FakeLangGraph]:
-    fake_supabase = FakeSupabaseAgent()
-    fake_langgraph = FakeLangGraph()
+def test_app(_shared_app, monkeypatch) -> Tuple[TestClient, FakeSupabaseAgent, FakeLangGraph]:
+    client, fake_supabase, fake_langgraph = _shared_app
+    fake_supabase.last_upload = {}
+    fake_langgraph.prompts.clear()
     monkeypatch.setattr(api_server, "supabase_agent", fake_supabase)
     monkeypatch.setattr(api_server, "langgraph_agent", fake_langgraph)
-    client = TestClient(api_server.app)
+    api_server.response_cache.clear()
+    api_server.schema_cache.clear()
     return client, fake_supabase, fake_langgraph
 
 
@@ -102,6 +114,72 @@ def test_chat_runs_langgraph(test_app):
     assert fake_langgraph.prompts[-1] == "show revenue"
 
 
+def test_chat_repeat_question_served_from_cache(test_app):
+    client, _, fake_langgraph = test_app
+    first = client.post("/api/chat", json={"message": "Show revenue", "conversationId": None})
+    second = client.post("/api/chat", json={"message": "show   revenue?", "conversationId": None})
+    assert first.status_code == second.status_code == 200
+    assert second.json()["response"] == first.json()["response"]
+    assert fake_langgraph.prompts == ["Show revenue"]
+
+
+def test_chat_follow_up_not_served_to_fresh_conversation(test_app):
+    client, _, fake_langgraph = test_app
+    client.post("/api/chat", json={"message": "Show sales", "conversationId": "conv_a"})
+    client.post("/api/chat", json={"message": "Show revenue", "conversationId": "conv_a"})
+    client.post("/api/chat", json={"message": "Show revenue", "conversationId": "conv_b"})
+    assert fake_langgraph.prompts == ["Show sales", "Show revenue", "Show revenue"]
+
+
+def test_schema_revalidation_returns_304(test_app):
+    client, _, _ = test_app
+    first = client.get("/api/schema")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    second = client.get("/api/schema", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+
+
+def test_tables_revalidation_returns_304(test_app):
+    client, _, _ = test_app
+    first = client.get("/api/tables")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    second = client.get("/api/tables", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+
+
+def test_schema_null_sample_next_to_numeric_is_text(test_app, monkeypatch):
+    client, fake_supabase, _ = test_app
+    monkeypatch.setattr(
+        fake_supabase, "get_table_sample",
+        lambda table_name, limit=5: {"success": True, "data": [{"country": None, "total_sales": 120}], "columns": []},
+    )
+    response = client.get("/api/schema")
+    assert response.status_code == 200
+    columns = response.json()["tables"][0]["columns"]
+    assert columns == [{"name": "country", "type": "text"}, {"name": "total_sales", "type": "numeric"}]
+
+
+def test_chat_count_question_skips_langgraph(test_app):
+    client, _, fake_langgraph = test_app
+    response = client.post("/api/chat", json={"message": "How many countries are there?", "conversationId": None})
+    assert response.status_code == 200
+    assert response.json()["response"] == "Found 2 countries."
+    assert fake_langgraph.prompts == []
+
+
+def test_chat_count_question_with_qualifier_runs_langgraph(test_app):
+    client, _, fake_langgraph = test_app
+    message = "How many countries have sales over 1M?"
+    response = client.post("/api/chat", json={"message": message, "conversationId": None})
+    assert response.status_code == 200
+    assert response.json()["response"] != "Found 2 countries."
+    assert fake_langgraph.prompts == [message]
+
+
 def test_analysis_endpoint_returns_rows(test_app):
     client, _, _ = test_app
     response = client.post("/api/analysis", json={"query": "find trends"})
@@ -0,0 +1,36 @@
+from agents.supabase_agent_original import SupabaseAgent, _parse_rest_query
+
+
+def test_and_chain_of_equalities_is_pushed_down():
+    parsed = _parse_rest_query("SELECT * FROM t WHERE a = 1 AND (b = 'x') LIMIT 5")
+    assert parsed == ("t", (("a", 1), ("b", "x")), 5)
+
+
+def test_numeric_literals_keep_their_type():
+    assert _parse_rest_query("SELECT * FROM t WHERE a = 2.5 AND b = '7'")[1] == (("a", 2.5), ("b", "7"))
+
+
+def test_negated_filter_is_not_pushed_down():
+    assert _parse_rest_query("SELECT * FROM t WHERE NOT (a = 1)")[1] is None
+
+
+def test_or_filter_is_not_pushed_down():
+    assert _parse_rest_query("SELECT * FROM t WHERE a = 1 OR b = 2")[1] is None
+    assert _parse_rest_query("SELECT * FROM t WHERE a = 1 AND (b = 2 OR c = 3)")[1] is None
+
+
+def test_non_equality_filter_is_not_pushed_down():
+    assert _parse_rest_query("SELECT * FROM t WHERE a > 1")[1] is None
+    assert _parse_rest_query("SELECT * FROM t WHERE a IN (SELECT a FROM u WHERE b = 2)")[1] is None
+
+
+def test_query_without_where_has_no_filters():
+    assert _parse_rest_query("SELECT * FROM t") == ("t", (), None)
+
+
+def test_unsupported_filter_reports_rest_limitation():
+    agent = SupabaseAgent.__new__(SupabaseAgent)
+    agent.db_connection = None
+    result = agent.execute_query("SELECT * FROM t WHERE a > 1")
+    assert result["success"] is False
+    assert "WHERE clause not supported" in result["error"]